@@ -0,0 +1,170 @@
+"""Score many positions per call with NumPy.
+
+``Game.evaluate_board`` and ``bitboard.evaluate`` score one position at a
+time.  For bulk work (tuning, book generation, analysing saved games) the
+functions here score a whole array of positions at once and return the
+same numbers.  Positions are encoded as rows of 25 points in board scan
+order: 0 for an empty point, 1 for Red and 2 for Green, so an array of
+shape ``(N, 25)`` holds N positions.
+
+The step and jump tables of ``bitboard`` are flattened into index arrays
+once at import.  The batch is transposed to one row per point, so every
+term is a gather of whole rows (or, for simple moves, one small matrix
+product with the adjacency matrix) followed by a sum down the columns, with
+no Python loop per position.
+
+NumPy is optional: the game itself never imports this module, and the
+functions raise ImportError if NumPy is not installed.  Run as a script to
+check the scores against ``Game.evaluate_board`` and time both::
+
+    python batch_eval.py --positions 100000
+"""
+
+import argparse
+import random
+import time
+
+import bitboard
+import engine
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+EMPTY = 0
+RED = 1
+GREEN = 2
+
+if np is not None:
+    # One row per simple move (src, dst) and per capture (src, mid, dst).
+    STEP_INDEX = np.array(
+        [(src, dst) for src in range(bitboard.NUM_POINTS) for dst in bitboard.STEPS[src]],
+        dtype=np.intp
+    )
+    JUMP_INDEX = np.array(
+        [(src, mid, dst) for src in range(bitboard.NUM_POINTS)
+         for mid, dst in bitboard.JUMPS[src]],
+        dtype=np.intp
+    )
+    CENTER_INDEX = np.array(
+        [bitboard.point_index(r, c) for r, c in bitboard.CENTER_POINTS], dtype=np.intp
+    )
+    # ADJACENCY @ empty counts the empty points one step from every point.
+    ADJACENCY = np.zeros((bitboard.NUM_POINTS, bitboard.NUM_POINTS), dtype=np.float32)
+    ADJACENCY[STEP_INDEX[:, 0], STEP_INDEX[:, 1]] = 1
+    _BITS = np.arange(bitboard.NUM_POINTS, dtype=np.int64)
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("batch evaluation needs numpy")
+
+
+def encode_boards(boards):
+    """``(N, 25)`` array of 5x5 list-of-lists boards."""
+    _require_numpy()
+    codes = {None: EMPTY, 'R': RED, 'G': GREEN}
+    return np.array(
+        [[codes[cell] for row in board for cell in row] for board in boards],
+        dtype=np.int8
+    ).reshape(-1, bitboard.NUM_POINTS)
+
+
+def encode_masks(red, green):
+    """``(N, 25)`` array of positions given as Red and Green bitmasks."""
+    _require_numpy()
+    red = np.asarray(red, dtype=np.int64).reshape(-1, 1)
+    green = np.asarray(green, dtype=np.int64).reshape(-1, 1)
+    encoded = ((red >> _BITS) & 1) * RED + ((green >> _BITS) & 1) * GREEN
+    return encoded.astype(np.int8)
+
+
+def encode_positions(positions):
+    """``(N, 25)`` array of ``bitboard.Position`` objects."""
+    positions = list(positions)
+    return encode_masks([p.red for p in positions], [p.green for p in positions])
+
+
+def mobility(own, other, empty, empty_neighbours):
+    """Per-position ``(simple_moves, captures)`` of the side owning ``own``.
+
+    ``own``, ``other`` and ``empty`` are boolean ``(25, N)`` arrays, one row
+    per point; ``empty_neighbours`` is ``ADJACENCY @ empty``.
+    """
+    simple = (empty_neighbours * own).sum(axis=0).astype(np.int64)
+    src, mid, dst = JUMP_INDEX.T
+    captures = np.count_nonzero(own[src] & other[mid] & empty[dst], axis=0)
+    return simple, captures
+
+
+def evaluate_batch(encoded, player):
+    """Scores of every position in ``encoded`` for ``player`` ('R' or 'G').
+
+    Term for term the same as ``bitboard.evaluate`` (and so as
+    ``Game.evaluate_board``), sign conventions included.  Returns an int64
+    array of length N.
+    """
+    _require_numpy()
+    points = np.ascontiguousarray(np.asarray(encoded).T)
+    red = points == RED
+    green = points == GREEN
+    empty = points == EMPTY
+    empty_neighbours = ADJACENCY @ empty.astype(np.float32)
+
+    red_simple, red_captures = mobility(red, green, empty, empty_neighbours)
+    green_simple, green_captures = mobility(green, red, empty, empty_neighbours)
+
+    material = (np.count_nonzero(red, axis=0).astype(np.int64)
+                - np.count_nonzero(green, axis=0)) * bitboard.MATERIAL_WEIGHT
+    score = (green_captures - red_captures).astype(np.int64) * bitboard.CAPTURE_WEIGHT
+    score += (np.count_nonzero(red[CENTER_INDEX], axis=0)
+              - np.count_nonzero(green[CENTER_INDEX], axis=0)) * bitboard.CENTER_WEIGHT
+    score += (red_simple + red_captures - green_simple - green_captures) * bitboard.MOBILITY_WEIGHT
+    return material + score if player == 'R' else material - score
+
+
+def random_positions(count, seed=0):
+    """``count`` random ``(red, green)`` mask pairs with 1 to 10 pieces a side."""
+    rng = random.Random(seed)
+    pairs = []
+    for _ in range(count):
+        red_count = rng.randint(1, 10)
+        green_count = rng.randint(1, 10)
+        points = rng.sample(range(bitboard.NUM_POINTS), red_count + green_count)
+        red = sum(1 << i for i in points[:red_count])
+        green = sum(1 << i for i in points[red_count:])
+        pairs.append((red, green))
+    return pairs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check and time batch evaluation.")
+    parser.add_argument("--positions", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    pairs = random_positions(args.positions, args.seed)
+    boards = [bitboard.to_board(red, green) for red, green in pairs]
+    game = engine.Game()
+
+    start = time.perf_counter()
+    expected = [game.evaluate_board(board, player) for player in "RG" for board in boards]
+    single_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    encoded = encode_masks([red for red, _ in pairs], [green for _, green in pairs])
+    scores = np.concatenate([evaluate_batch(encoded, player) for player in "RG"])
+    batch_time = time.perf_counter() - start
+
+    mismatches = int((scores != np.array(expected)).sum())
+    print(f"evaluate_board  {single_time:8.3f}s  {len(expected) / single_time:12.0f} positions/s")
+    print(f"evaluate_batch  {batch_time:8.3f}s  {len(expected) / batch_time:12.0f} positions/s"
+          f"  speedup {single_time / batch_time:.0f}x")
+    print(f"{mismatches} mismatches in {len(expected)} scores")
+    if mismatches:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
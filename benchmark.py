@@ -0,0 +1,264 @@
+"""Benchmarks for move generation, evaluation, AI search and rendering.
+
+Each benchmark runs a fixed workload several times and records the median
+time.  Results are written as JSON and, if a baseline file exists, compared
+against it; any benchmark slower than the baseline by more than the
+threshold is reported and makes the script exit with status 1::
+
+    python benchmark.py                      # compare with benchmark_baseline.json
+    python benchmark.py --save-baseline      # record a new baseline
+    python benchmark.py --threshold 0.25 -o results.json
+
+Everything is seeded, the Hard AI searches to a fixed depth and the MCTS AI
+runs a fixed number of playouts instead of a time limit, so the work done
+is the same on every run; search benchmarks
+also record their node counts, which change only when the search does.
+The rendering benchmark uses SDL's dummy video driver, with blank
+placeholder images for any game asset missing from the tree, and is
+skipped without pygame; the batch evaluation benchmark is skipped without
+NumPy.  Skipped benchmarks are listed in the comparison.
+"""
+
+import argparse
+import atexit
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+import engine
+
+BASELINE_FILE = "benchmark_baseline.json"
+DEFAULT_THRESHOLD = 0.10
+DEFAULT_REPEAT = 5
+SEED = 1234
+HARD_DEPTH = 5
+MCTS_PLAYOUTS = 500
+
+# Curated positions: rows top to bottom, '.' for an empty point, and the
+# side to move.
+POSITIONS = [
+    ("RRRRR/RRRRR/...../GGGGG/GGGGG", 'R'),
+    ("RRRRR/R.R.R/R.G.R/G...G/GGGGG", 'R'),
+    ("RRR.R/R.R../R.G.R/GG.RR/GGGGG", 'R'),
+    ("RRRR./RR..R/.R..R/.GGGR/GGGG.", 'G'),
+    ("R.RRR/RR..R/R..G./GGRG./GGGGR", 'R'),
+    ("RRRR./R..R./....R/.GRR./RGG.G", 'R'),
+    (".RR.R/RR.../..RRR/R..../RGGG.", 'G'),
+]
+
+
+def parse_board(text):
+    return [[None if ch == '.' else ch for ch in row] for row in text.split("/")]
+
+
+def _time(workload, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        workload()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def bench_move_generation(repeat):
+    game = engine.Game()
+    boards = [parse_board(text) for text, _ in POSITIONS]
+
+    def workload():
+        for _ in range(200):
+            for board in boards:
+                game.find_all_moves_for_player('R', board)
+                game.find_all_moves_for_player('G', board)
+    return {"seconds": _time(workload, repeat)}
+
+
+def bench_evaluation(repeat):
+    game = engine.Game()
+    boards = [parse_board(text) for text, _ in POSITIONS]
+
+    def workload():
+        for _ in range(100):
+            for board in boards:
+                game.evaluate_board(board, 'R')
+                game.evaluate_board(board, 'G')
+    return {"seconds": _time(workload, repeat)}
+
+
+def bench_batch_evaluation(repeat):
+    try:
+        import batch_eval
+        batch_eval.encode_boards([])
+    except ImportError as e:
+        print("Skipping batch evaluation benchmark:", e)
+        return None
+    # The evaluation benchmark's workload, scored in one batch per side.
+    encoded = batch_eval.encode_boards([parse_board(text) for text, _ in POSITIONS] * 100)
+
+    def workload():
+        batch_eval.evaluate_batch(encoded, 'R')
+        batch_eval.evaluate_batch(encoded, 'G')
+    return {"seconds": _time(workload, repeat)}
+
+
+def bench_search(difficulty, repeat):
+    tablebase = engine.load_tablebase()
+    nodes = []
+    # Easy does no search; repeat it so its time is measurable.
+    rounds = 100 if difficulty == "Easy" else 1
+
+    def workload():
+        nodes.clear()
+        random.seed(SEED)
+        for text, side in POSITIONS * rounds:
+            # A fresh game per search so the transposition table is empty.
+            game = engine.Game(tablebase=tablebase)
+            game.hard_time_limit = None
+            game.hard_max_depth = HARD_DEPTH
+            if difficulty == "MCTS":
+                game.mcts_time_limit = None
+                game.mcts_playouts = MCTS_PLAYOUTS
+                game.mcts_searcher.rng.seed(SEED)
+            game.get_best_move_ai(parse_board(text), side, difficulty)
+            if difficulty == "MCTS":
+                nodes.append(game.mcts_searcher.playouts)
+            elif difficulty != "Easy":
+                nodes.append(game.searcher.nodes)
+    return {"seconds": _time(workload, repeat), "nodes": sum(nodes)}
+
+
+def _use_placeholder_images(main, pygame):
+    """Make ``main`` load a blank image for every image asset it cannot find."""
+    resource_path = main.resource_path
+    folder = tempfile.mkdtemp(prefix="bagh_bandi_bench_")
+    atexit.register(shutil.rmtree, folder, ignore_errors=True)
+
+    def placeholder_path(relative_path):
+        try:
+            return resource_path(relative_path)
+        except FileNotFoundError:
+            if not relative_path.endswith(".png"):
+                raise
+            path = os.path.join(folder, os.path.basename(relative_path))
+            if not os.path.exists(path):
+                pygame.image.save(pygame.Surface((64, 64), pygame.SRCALPHA), path)
+            return path
+
+    main.resource_path = placeholder_path
+
+
+def bench_render(repeat):
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+    os.environ["SDL_AUDIODRIVER"] = "dummy"
+    try:
+        import pygame
+        import main
+    except ImportError as e:
+        print("Skipping render benchmark:", e)
+        return None
+    _use_placeholder_images(main, pygame)
+    app = main.BaghChalPygame()
+
+    app.game_mode = "playing"
+    app.mode = "Play with AI"
+    app.ai_player = 'G'
+    app.board = parse_board(POSITIONS[1][0])
+    app.selected = (2, 0)
+    app.legal_moves = app.find_legal_moves(2, 0)
+
+    def workload():
+        app.selection_ring.update()
+        app.draw_game_screen()
+    return {"seconds": _time(workload, repeat)}
+
+
+def run_benchmarks(repeat=DEFAULT_REPEAT, log=print):
+    results = {}
+    benchmarks = [
+        ("move_generation", lambda: bench_move_generation(repeat)),
+        ("evaluation", lambda: bench_evaluation(repeat)),
+        ("batch_evaluation", lambda: bench_batch_evaluation(repeat)),
+    ]
+    for difficulty in engine.DIFFICULTIES:
+        benchmarks.append((f"search_{difficulty.lower()}",
+                           lambda d=difficulty: bench_search(d, repeat)))
+    benchmarks.append(("render_frame", lambda: bench_render(repeat)))
+
+    for name, benchmark in benchmarks:
+        result = benchmark()
+        if result is None:
+            continue
+        results[name] = result
+        extra = f"  {result['nodes']} nodes" if "nodes" in result else ""
+        log(f"{name:<18} {1000 * result['seconds']:10.2f} ms{extra}")
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Names of benchmarks that got slower than ``baseline`` by more than ``threshold``."""
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            print(f"{name:<18} not in baseline (record it with --save-baseline)")
+            continue
+        old = baseline[name]["seconds"]
+        ratio = result["seconds"] / old if old else 1.0
+        flag = ""
+        if ratio > 1 + threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        if "nodes" in result and result["nodes"] != baseline[name].get("nodes"):
+            flag += f"  (nodes {baseline[name].get('nodes')} -> {result['nodes']})"
+        print(f"{name:<18} {ratio:6.2f}x baseline{flag}")
+    for name in baseline:
+        if name not in results:
+            print(f"{name:<18} skipped")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the engine and renderer.")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="write the results to the baseline file")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown before a benchmark counts as a regression")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("-o", "--output", help="write the results to this JSON file")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.repeat)
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "benchmarks": results,
+    }
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=4)
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=4)
+        print("Baseline saved to", args.baseline)
+        return
+
+    if not os.path.exists(args.baseline):
+        print("No baseline at", args.baseline)
+        return
+    with open(args.baseline) as f:
+        baseline = json.load(f)["benchmarks"]
+    print()
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
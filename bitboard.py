@@ -0,0 +1,445 @@
+"""Bitboard representation of the Bagh Bandi board used by the AI search.
+
+Each side is stored as a 25-bit mask with bit ``r * GRID_SIZE + c`` set for
+every point it occupies.  Step and jump tables are precomputed once per point,
+so move generation, piece counting and capture detection become a handful of
+mask operations instead of scans over the 5x5 list-of-lists used by the UI.
+
+Moves are ``(src, dst, mid)`` index triples; ``mid`` is the index of the
+jumped piece for a capture and ``-1`` for a simple move.
+"""
+
+import random
+
+GRID_SIZE = 5
+NUM_POINTS = GRID_SIZE * GRID_SIZE
+FULL_MASK = (1 << NUM_POINTS) - 1
+
+ORTHOGONAL = ((-1, 0), (1, 0), (0, -1), (0, 1))
+DIAGONAL = ((-1, -1), (-1, 1), (1, -1), (1, 1))
+
+CENTER_POINTS = ((2, 2), (1, 2), (2, 1), (2, 3), (3, 2))
+
+
+def point_index(r, c):
+    return r * GRID_SIZE + c
+
+
+def point_coords(i):
+    return divmod(i, GRID_SIZE)
+
+
+def _inside(r, c):
+    return 0 <= r < GRID_SIZE and 0 <= c < GRID_SIZE
+
+
+def _directions(r, c):
+    # Diagonal lines only pass through the points where r + c is even.
+    if (r + c) % 2 == 0:
+        return ORTHOGONAL + DIAGONAL
+    return ORTHOGONAL
+
+
+def _build_tables():
+    steps = []
+    jumps = []
+    for i in range(NUM_POINTS):
+        r, c = point_coords(i)
+        point_steps = []
+        point_jumps = []
+        for dr, dc in _directions(r, c):
+            if _inside(r + dr, c + dc):
+                point_steps.append(point_index(r + dr, c + dc))
+                if _inside(r + 2 * dr, c + 2 * dc):
+                    point_jumps.append((point_index(r + dr, c + dc),
+                                        point_index(r + 2 * dr, c + 2 * dc)))
+        steps.append(tuple(point_steps))
+        jumps.append(tuple(point_jumps))
+    return tuple(steps), tuple(jumps)
+
+
+# STEPS[i]: neighbours reachable with a simple move from i, in the same
+# direction order as BaghChalPygame.valid_directions.
+# JUMPS[i]: (mid, dst) pairs for every capture line starting at i.
+STEPS, JUMPS = _build_tables()
+STEP_MASKS = tuple(sum(1 << j for j in STEPS[i]) for i in range(NUM_POINTS))
+CENTER_MASK = sum(1 << point_index(r, c) for r, c in CENTER_POINTS)
+
+# Weights of the evaluate_board terms, from Red's point of view.
+MATERIAL_WEIGHT = 1000
+CAPTURE_WEIGHT = 50
+CENTER_WEIGHT = 10
+MOBILITY_WEIGHT = 5
+
+
+def _board_lines():
+    # Every step and jump runs between consecutive points of one of these
+    # lines: 5 rows, 5 columns, the 2 long diagonals and the 4 short
+    # diagonals of the center diamond.
+    lines = [[point_index(r, c) for c in range(GRID_SIZE)] for r in range(GRID_SIZE)]
+    lines += [[point_index(r, c) for r in range(GRID_SIZE)] for c in range(GRID_SIZE)]
+    lines.append([point_index(i, i) for i in range(GRID_SIZE)])
+    lines.append([point_index(i, GRID_SIZE - 1 - i) for i in range(GRID_SIZE)])
+    lines.append([point_index(0, 2), point_index(1, 1), point_index(2, 0)])
+    lines.append([point_index(0, 2), point_index(1, 3), point_index(2, 4)])
+    lines.append([point_index(2, 0), point_index(3, 1), point_index(4, 2)])
+    lines.append([point_index(2, 4), point_index(3, 3), point_index(4, 2)])
+    return tuple(tuple(line) for line in lines)
+
+
+def _line_table(length):
+    # Positional score of every state of a line, indexed by its base-3 code
+    # (digit i: 0 empty, 1 Red, 2 Green).  Covers the mobility and capture
+    # terms of evaluate() for the moves running along the line.
+    table = []
+    for code in range(3 ** length):
+        cells = []
+        for _ in range(length):
+            code, digit = divmod(code, 3)
+            cells.append(digit)
+        score = 0
+        for i, cell in enumerate(cells):
+            if not cell:
+                continue
+            sign = 1 if cell == 1 else -1
+            for step in (-1, 1):
+                j = i + step
+                if not 0 <= j < length:
+                    continue
+                if cells[j] == 0:
+                    score += sign * MOBILITY_WEIGHT
+                elif cells[j] != cell and 0 <= j + step < length and cells[j + step] == 0:
+                    score += sign * (MOBILITY_WEIGHT - CAPTURE_WEIGHT)
+        table.append(score)
+    return tuple(table)
+
+
+LINES = _board_lines()
+_LINE_TABLES = {length: _line_table(length) for length in {len(line) for line in LINES}}
+# POINT_LINES[q]: (line, 3 ** position of q on the line, line table) for every
+# line through q.
+POINT_LINES = tuple(
+    tuple((n, 3 ** line.index(q), _LINE_TABLES[len(line)])
+          for n, line in enumerate(LINES) if q in line)
+    for q in range(NUM_POINTS)
+)
+POINT_CENTER = tuple(CENTER_WEIGHT if CENTER_MASK >> q & 1 else 0
+                     for q in range(NUM_POINTS))
+
+INITIAL_RED = (1 << 10) - 1
+INITIAL_GREEN = FULL_MASK ^ ((1 << 15) - 1)
+
+# Zobrist keys: one random 64-bit value per (point, colour) plus one for
+# Green to move.  The fixed seed keeps hashes stable across runs.
+_zobrist_rng = random.Random(0x0BA6BA7D)
+ZOBRIST_RED = tuple(_zobrist_rng.getrandbits(64) for _ in range(NUM_POINTS))
+ZOBRIST_GREEN = tuple(_zobrist_rng.getrandbits(64) for _ in range(NUM_POINTS))
+ZOBRIST_GREEN_TO_MOVE = _zobrist_rng.getrandbits(64)
+del _zobrist_rng
+
+try:
+    popcount = int.bit_count
+except AttributeError:  # Python < 3.10
+    def popcount(mask):
+        return bin(mask).count("1")
+
+
+def iter_bits(mask):
+    """Yield the set bit indices of ``mask`` in ascending (board scan) order."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def from_board(board):
+    """Convert a 5x5 list-of-lists board into ``(red, green)`` masks."""
+    red = 0
+    green = 0
+    for r in range(GRID_SIZE):
+        row = board[r]
+        for c in range(GRID_SIZE):
+            if row[c] == 'R':
+                red |= 1 << point_index(r, c)
+            elif row[c] == 'G':
+                green |= 1 << point_index(r, c)
+    return red, green
+
+
+def to_board(red, green):
+    board = [[None for _ in range(GRID_SIZE)] for _ in range(GRID_SIZE)]
+    for i in iter_bits(red):
+        r, c = point_coords(i)
+        board[r][c] = 'R'
+    for i in iter_bits(green):
+        r, c = point_coords(i)
+        board[r][c] = 'G'
+    return board
+
+
+def generate_moves(own, other):
+    """All moves for the side owning ``own``.
+
+    The order matches ``BaghChalPygame.find_all_moves_for_player``: pieces in
+    board scan order, simple moves before captures for each piece.
+    """
+    empty = FULL_MASK ^ (own | other)
+    moves = []
+    append = moves.append
+    while own:
+        low = own & -own
+        own ^= low
+        src = low.bit_length() - 1
+        for dst in STEPS[src]:
+            if empty >> dst & 1:
+                append((src, dst, -1))
+        for mid, dst in JUMPS[src]:
+            if other >> mid & 1 and empty >> dst & 1:
+                append((src, dst, mid))
+    return moves
+
+
+def generate_captures(own, other):
+    empty = FULL_MASK ^ (own | other)
+    moves = []
+    while own:
+        low = own & -own
+        own ^= low
+        src = low.bit_length() - 1
+        for mid, dst in JUMPS[src]:
+            if other >> mid & 1 and empty >> dst & 1:
+                moves.append((src, dst, mid))
+    return moves
+
+
+def has_moves(own, other):
+    empty = FULL_MASK ^ (own | other)
+    while own:
+        low = own & -own
+        own ^= low
+        src = low.bit_length() - 1
+        if STEP_MASKS[src] & empty:
+            return True
+        for mid, dst in JUMPS[src]:
+            if other >> mid & 1 and empty >> dst & 1:
+                return True
+    return False
+
+
+def mobility(own, other):
+    """Return ``(simple_moves, captures)`` available to the side owning ``own``."""
+    empty = FULL_MASK ^ (own | other)
+    simple = 0
+    captures = 0
+    while own:
+        low = own & -own
+        own ^= low
+        src = low.bit_length() - 1
+        simple += popcount(STEP_MASKS[src] & empty)
+        for mid, dst in JUMPS[src]:
+            if other >> mid & 1 and empty >> dst & 1:
+                captures += 1
+    return simple, captures
+
+
+def apply_move(own, other, move):
+    """Return the ``(own, other)`` masks after ``move`` is played by ``own``."""
+    src, dst, mid = move
+    own ^= (1 << src) | (1 << dst)
+    if mid >= 0:
+        other ^= 1 << mid
+    return own, other
+
+
+def evaluate(red, green, player):
+    """Mask-based equivalent of ``BaghChalPygame.evaluate_board``.
+
+    Reproduces the list-based scoring term for term, including its sign
+    conventions, so both return identical scores for the same position.
+    """
+    red_simple, red_captures = mobility(red, green)
+    green_simple, green_captures = mobility(green, red)
+
+    # evaluate_board negates only the positional terms for Green, so the
+    # material term always reads as Red minus Green.
+    material = (popcount(red) - popcount(green)) * MATERIAL_WEIGHT
+    score = (green_captures - red_captures) * CAPTURE_WEIGHT
+    score += (popcount(red & CENTER_MASK) - popcount(green & CENTER_MASK)) * CENTER_WEIGHT
+    score += (red_simple + red_captures - green_simple - green_captures) * MOBILITY_WEIGHT
+    return material + score if player == 'R' else material - score
+
+
+def zobrist_key(red, green, side):
+    key = ZOBRIST_GREEN_TO_MOVE if side == 'G' else 0
+    for i in iter_bits(red):
+        key ^= ZOBRIST_RED[i]
+    for i in iter_bits(green):
+        key ^= ZOBRIST_GREEN[i]
+    return key
+
+
+def move_to_tuple(move):
+    """Convert an index move into the UI's ``(sr, sc, dr, dc, type)`` tuple."""
+    src, dst, mid = move
+    sr, sc = point_coords(src)
+    dr, dc = point_coords(dst)
+    return (sr, sc, dr, dc, 'move' if mid < 0 else 'capture')
+
+
+def move_from_tuple(move):
+    sr, sc, dr, dc, move_type = move
+    mid = -1
+    if move_type == 'capture':
+        mid = point_index((sr + dr) // 2, (sc + dc) // 2)
+    return (point_index(sr, sc), point_index(dr, dc), mid)
+
+
+class Position:
+    """Mutable search position with in-place make/unmake.
+
+    ``make_move`` and ``unmake_move`` only flip bits in the two masks and the
+    Zobrist ``key``, so a search can walk the whole tree on a single instance
+    without allocating a new board per node.  Every ``make_move`` must be
+    undone in reverse order.
+
+    As in the live game, a capture earns the capturing side an extra turn:
+    ``side`` only passes to the opponent after a simple move, or after a
+    capture that leaves the capturing side without a legal move.
+
+    The evaluation is maintained by deltas as well.  ``material`` is Red
+    minus Green piece count and ``positional`` holds the capture-threat,
+    center and mobility terms.  Those terms are sums over the lines in
+    ``LINES``, so a move only re-reads the line tables for the handful of
+    lines through the points it touches and ``evaluate`` is constant-time.
+    """
+
+    __slots__ = ("red", "green", "side", "key", "material", "positional",
+                 "_line_codes", "_history")
+
+    def __init__(self, red=INITIAL_RED, green=INITIAL_GREEN, side='R'):
+        self.red = red
+        self.green = green
+        self.side = side
+        self.key = zobrist_key(red, green, side)
+        self.material = popcount(red) - popcount(green)
+        codes = []
+        for line in LINES:
+            code = 0
+            for q in reversed(line):
+                code = code * 3 + (1 if red >> q & 1 else 2 if green >> q & 1 else 0)
+            codes.append(code)
+        self._line_codes = codes
+        self.positional = (popcount(red & CENTER_MASK) - popcount(green & CENTER_MASK)) * CENTER_WEIGHT
+        for line, code in zip(LINES, codes):
+            self.positional += _LINE_TABLES[len(line)][code]
+        self._history = []
+
+    @classmethod
+    def from_board(cls, board, side='R'):
+        red, green = from_board(board)
+        return cls(red, green, side)
+
+    def to_board(self):
+        return to_board(self.red, self.green)
+
+    def copy(self):
+        return Position(self.red, self.green, self.side)
+
+    def own_masks(self, side=None):
+        """Return ``(own, other)`` masks from the point of view of ``side``."""
+        if (side or self.side) == 'R':
+            return self.red, self.green
+        return self.green, self.red
+
+    def count(self, side):
+        return popcount(self.red if side == 'R' else self.green)
+
+    def legal_moves(self):
+        own, other = self.own_masks()
+        return generate_moves(own, other)
+
+    def evaluate(self, player):
+        """Constant-time ``evaluate(self.red, self.green, player)``."""
+        if player == 'R':
+            return self.material * MATERIAL_WEIGHT + self.positional
+        return self.material * MATERIAL_WEIGHT - self.positional
+
+    def _shift_lines(self, q, delta):
+        # Add ``delta`` to q's digit in the code of every line through q.
+        codes = self._line_codes
+        positional = self.positional
+        for line, power, table in POINT_LINES[q]:
+            old = codes[line]
+            new = old + delta * power
+            codes[line] = new
+            positional += table[new] - table[old]
+        self.positional = positional
+
+    def make_move(self, move):
+        src, dst, mid = move
+        self._history.append(self.side)
+        if self.side == 'R':
+            self.red ^= (1 << src) | (1 << dst)
+            key = self.key ^ ZOBRIST_RED[src] ^ ZOBRIST_RED[dst]
+            self.positional += POINT_CENTER[dst] - POINT_CENTER[src]
+            self._shift_lines(src, -1)
+            self._shift_lines(dst, 1)
+            if mid >= 0:
+                self.green ^= 1 << mid
+                key ^= ZOBRIST_GREEN[mid]
+                self.material += 1
+                self.positional += POINT_CENTER[mid]
+                self._shift_lines(mid, -2)
+                if has_moves(self.red, self.green):
+                    self.key = key
+                    return
+            self.side = 'G'
+        else:
+            self.green ^= (1 << src) | (1 << dst)
+            key = self.key ^ ZOBRIST_GREEN[src] ^ ZOBRIST_GREEN[dst]
+            self.positional += POINT_CENTER[src] - POINT_CENTER[dst]
+            self._shift_lines(src, -2)
+            self._shift_lines(dst, 2)
+            if mid >= 0:
+                self.red ^= 1 << mid
+                key ^= ZOBRIST_RED[mid]
+                self.material -= 1
+                self.positional -= POINT_CENTER[mid]
+                self._shift_lines(mid, -1)
+                if has_moves(self.green, self.red):
+                    self.key = key
+                    return
+            self.side = 'R'
+        self.key = key ^ ZOBRIST_GREEN_TO_MOVE
+
+    def unmake_move(self, move):
+        src, dst, mid = move
+        side = self._history.pop()
+        if side != self.side:
+            self.key ^= ZOBRIST_GREEN_TO_MOVE
+            self.side = side
+        if side == 'R':
+            self.red ^= (1 << src) | (1 << dst)
+            key = self.key ^ ZOBRIST_RED[src] ^ ZOBRIST_RED[dst]
+            self.positional += POINT_CENTER[src] - POINT_CENTER[dst]
+            self._shift_lines(dst, -1)
+            self._shift_lines(src, 1)
+            if mid >= 0:
+                self.green ^= 1 << mid
+                key ^= ZOBRIST_GREEN[mid]
+                self.material -= 1
+                self.positional -= POINT_CENTER[mid]
+                self._shift_lines(mid, 2)
+        else:
+            self.green ^= (1 << src) | (1 << dst)
+            key = self.key ^ ZOBRIST_GREEN[src] ^ ZOBRIST_GREEN[dst]
+            self.positional += POINT_CENTER[dst] - POINT_CENTER[src]
+            self._shift_lines(dst, -2)
+            self._shift_lines(src, 2)
+            if mid >= 0:
+                self.red ^= 1 << mid
+                key ^= ZOBRIST_RED[mid]
+                self.material += 1
+                self.positional += POINT_CENTER[mid]
+                self._shift_lines(mid, 1)
+        self.key = key
@@ -0,0 +1,638 @@
+"""Headless Bagh Bandi engine: rules, game state and AI.
+
+Nothing here imports pygame or needs a display.  ``Game`` holds one game
+(board, side to move, extra-turn flag and winner) together with the AI that
+plays it; ``BaghChalPygame`` in main.py is a front end over it.
+
+A ``Game`` is cheap: its searcher and transposition table are only built
+the first time it searches, and the opening book and tablebase are shared
+by every game that is given them.  Load those once per process with
+``load_opening_book`` and ``load_tablebase``.
+"""
+
+import json
+import os
+import random
+import sys
+import time
+
+import bitboard
+import opening_book
+import search
+import tablebase
+
+GRID_SIZE = 5
+DIFFICULTIES = ("Easy", "Medium", "Hard", "MCTS")
+# Medium AI search depth
+MEDIUM_DEPTH = 2
+# Hard AI search budget per move (seconds / nodes, None for no limit)
+HARD_MAX_DEPTH = 32
+HARD_TIME_LIMIT = 1.5
+HARD_NODE_LIMIT = None
+# MCTS AI budget per move (seconds / playouts, None for no limit) and the
+# worker processes running its playouts (1 plays them out in-process)
+MCTS_TIME_LIMIT = 1.5
+MCTS_PLAYOUTS = None
+MCTS_WORKERS = 1
+
+_shared_books = {}
+_shared_tablebases = {}
+
+
+def data_path(name):
+    """Path of a data file shipped next to the engine (or in the bundle)."""
+    base_path = getattr(sys, "_MEIPASS", os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(base_path, name)
+
+
+def load_opening_book(path=None):
+    """Load an opening book once per process; later calls share it."""
+    path = path or data_path(opening_book.BOOK_FILE)
+    if path not in _shared_books:
+        _shared_books[path] = opening_book.OpeningBook.load(path)
+    return _shared_books[path]
+
+
+def load_tablebase(path=None):
+    """Memory-map a tablebase once per process, or return None if missing."""
+    path = path or data_path(tablebase.TABLEBASE_FILE)
+    if path not in _shared_tablebases:
+        try:
+            _shared_tablebases[path] = tablebase.Tablebase.open(path)
+        except Exception as e:
+            print("Tablebase load failed:", e)
+            _shared_tablebases[path] = None
+    return _shared_tablebases[path]
+
+
+def initial_board():
+    board = [[None for _ in range(GRID_SIZE)] for _ in range(GRID_SIZE)]
+    idx = 0
+    for r in range(GRID_SIZE):
+        for c in range(GRID_SIZE):
+            if idx < 10:
+                board[r][c] = 'R'
+            elif idx >= 15:
+                board[r][c] = 'G'
+            idx += 1
+    return board
+
+
+def _build_dependents():
+    # DEPENDENTS[q]: the points whose moves change when q is filled or
+    # emptied (q is one of their step targets, jumped points or landings).
+    dependents = [set() for _ in range(bitboard.NUM_POINTS)]
+    for p in range(bitboard.NUM_POINTS):
+        for q in bitboard.STEPS[p]:
+            dependents[q].add(p)
+        for mid, dst in bitboard.JUMPS[p]:
+            dependents[mid].add(p)
+            dependents[dst].add(p)
+    return tuple(frozenset(points) for points in dependents)
+
+
+DEPENDENTS = _build_dependents()
+
+
+class MoveIndex:
+    """Legal destinations of every piece on a board, updated move by move.
+
+    ``moves`` maps the point index of each piece to ``(side, destinations)``,
+    destinations being ``(r, c)`` tuples in the order ``find_legal_moves``
+    returns them.  ``pieces`` and ``movable`` count, per side, the pieces
+    on the board and those with at least one move.  After a move only the
+    pieces in ``DEPENDENTS`` of the points it touched are looked at again.
+    """
+
+    __slots__ = ("board", "moves", "pieces", "movable")
+
+    def __init__(self, board):
+        self.board = board
+        self.moves = {}
+        self.pieces = {'R': 0, 'G': 0}
+        self.movable = {'R': 0, 'G': 0}
+        for i in range(bitboard.NUM_POINTS):
+            self._refresh(i)
+
+    def copy(self, board):
+        """Index of ``board``, a copy of the indexed board."""
+        index = MoveIndex.__new__(MoveIndex)
+        index.board = board
+        index.moves = dict(self.moves)
+        index.pieces = dict(self.pieces)
+        index.movable = dict(self.movable)
+        return index
+
+    def _refresh(self, i):
+        old = self.moves.pop(i, None)
+        if old is not None:
+            side, destinations = old
+            self.pieces[side] -= 1
+            if destinations:
+                self.movable[side] -= 1
+
+        board = self.board
+        r, c = divmod(i, GRID_SIZE)
+        piece = board[r][c]
+        if piece is None:
+            return
+        targets = [q for q in bitboard.STEPS[i] if board[q // GRID_SIZE][q % GRID_SIZE] is None]
+        for mid, dst in bitboard.JUMPS[i]:
+            if (board[dst // GRID_SIZE][dst % GRID_SIZE] is None
+                    and board[mid // GRID_SIZE][mid % GRID_SIZE] not in (None, piece)):
+                targets.append(dst)
+        destinations = [divmod(q, GRID_SIZE) for q in sorted(targets)]
+        self.moves[i] = (piece, destinations)
+        self.pieces[piece] += 1
+        if destinations:
+            self.movable[piece] += 1
+
+    def update(self, src, dst, mid=-1):
+        """Catch up with a move from ``src`` to ``dst`` already made on the board."""
+        touched = {src, dst}
+        points = DEPENDENTS[src] | DEPENDENTS[dst]
+        if mid >= 0:
+            touched.add(mid)
+            points |= DEPENDENTS[mid]
+        for i in touched | points:
+            self._refresh(i)
+
+    def legal_moves(self, r, c):
+        entry = self.moves.get(r * GRID_SIZE + c)
+        return list(entry[1]) if entry else []
+
+
+class Game:
+    """One game of Bagh Bandi and the AI that can play either side.
+
+    Moves are ``(sr, sc, dr, dc, type)`` tuples with ``type`` either
+    ``'move'`` or ``'capture'``.  A capture gives the capturing side another
+    turn.  After a player's capture (``make_move``) the turn passes at once
+    if the capturing piece has no move left; after an AI capture
+    (``apply_move``) it passes if no piece of that side can move.  A side
+    that has lost every piece loses, as does a side whose extra turn passes
+    to an opponent that cannot move.
+
+    The rule queries on the game's own board (``find_legal_moves``,
+    ``any_legal_moves_for``, ``count_pieces``) read a ``MoveIndex`` that
+    ``make_move`` keeps up to date.  Change the board only through
+    ``make_move`` or by assigning a new ``board``.
+    """
+
+    def __init__(self, board=None, current_player='R', extra_turn_after_capture=False,
+                 opening_book=None, tablebase=None, tt_entries=search.DEFAULT_TT_ENTRIES):
+        self._move_index = None
+        self.board = board if board is not None else initial_board()
+        self.current_player = current_player
+        self.extra_turn_after_capture = extra_turn_after_capture
+        self.winner = None
+        self.opening_book = opening_book
+        self.tablebase = tablebase
+        self.parallel_searcher = None
+        self.tt_entries = tt_entries
+        self._searcher = None
+        self._mcts_searcher = None
+        # Hard AI search budget; defaults to the module settings.
+        self.hard_max_depth = HARD_MAX_DEPTH
+        self.hard_time_limit = HARD_TIME_LIMIT
+        self.hard_node_limit = HARD_NODE_LIMIT
+        # MCTS AI budget and playout workers
+        self.mcts_time_limit = MCTS_TIME_LIMIT
+        self.mcts_playouts = MCTS_PLAYOUTS
+        self.mcts_workers = MCTS_WORKERS
+        # Optional JSON-lines file receiving the statistics of every AI move.
+        self.search_log = None
+        # Zobrist key -> (difficulty, move, stats) found by ponder()
+        self.ponder_cache = {}
+
+    @property
+    def board(self):
+        return self._board
+
+    @board.setter
+    def board(self, board):
+        self._board = board
+        self._move_index = None
+
+    @property
+    def move_index(self):
+        """``MoveIndex`` of the board, built on first use."""
+        if self._move_index is None:
+            self._move_index = MoveIndex(self._board)
+        return self._move_index
+
+    @property
+    def searcher(self):
+        if self._searcher is None:
+            self._searcher = search.Searcher(tt_entries=self.tt_entries)
+        self._searcher.tablebase = self.tablebase
+        return self._searcher
+
+    @property
+    def mcts_searcher(self):
+        if self._mcts_searcher is None:
+            # Imported here: mcts pulls in the process pool machinery, which
+            # would add tens of milliseconds to every ``import engine``.
+            import mcts
+            self._mcts_searcher = mcts.MCTS(self.mcts_workers)
+        return self._mcts_searcher
+
+    def reset(self):
+        self.board = initial_board()
+        self.current_player = 'R'
+        self.extra_turn_after_capture = False
+        self.winner = None
+        self.ponder_cache = {}
+        if self._mcts_searcher is not None:
+            self._mcts_searcher.reset()
+
+    def close(self):
+        """Shut down the worker processes of the parallel and MCTS searches."""
+        if self.parallel_searcher:
+            self.parallel_searcher.close()
+        if self._mcts_searcher is not None:
+            self._mcts_searcher.close()
+
+    def copy(self):
+        """Independent copy of the game state sharing the book and tablebase."""
+        game = Game([row[:] for row in self.board], self.current_player,
+                    self.extra_turn_after_capture, self.opening_book,
+                    self.tablebase, self.tt_entries)
+        game.winner = self.winner
+        if self._move_index is not None:
+            game._move_index = self._move_index.copy(game.board)
+        game.hard_max_depth = self.hard_max_depth
+        game.hard_time_limit = self.hard_time_limit
+        game.hard_node_limit = self.hard_node_limit
+        game.mcts_time_limit = self.mcts_time_limit
+        game.mcts_playouts = self.mcts_playouts
+        game.mcts_workers = self.mcts_workers
+        game.search_log = self.search_log
+        return game
+
+    def position(self, side=None):
+        return bitboard.Position.from_board(self.board, side or self.current_player)
+
+    # ---- Rules ----
+
+    def opponent(self, player):
+        return 'G' if player == 'R' else 'R'
+
+    def is_inside(self, r, c):
+        return 0 <= r < GRID_SIZE and 0 <= c < GRID_SIZE
+
+    def valid_directions(self, r, c):
+        dirs = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+        if (r + c) % 2 == 0:
+            dirs += [(-1, -1), (-1, 1), (1, -1), (1, 1)]
+        return dirs
+
+    def can_move_simple(self, sr, sc, dr, dc):
+        if not self.is_inside(dr, dc) or self.board[dr][dc] is not None:
+            return False
+        for d in self.valid_directions(sr, sc):
+            if sr + d[0] == dr and sc + d[1] == dc:
+                return True
+        return False
+
+    def can_capture(self, sr, sc, dr, dc):
+        if not self.is_inside(dr, dc) or self.board[dr][dc] is not None:
+            return False
+        for d in self.valid_directions(sr, sc):
+            mid_r, mid_c = sr + d[0], sc + d[1]
+            end_r, end_c = sr + 2 * d[0], sc + 2 * d[1]
+            if (end_r, end_c) == (dr, dc):
+                if self.is_inside(mid_r, mid_c) and self.board[mid_r][mid_c] == self.opponent(self.board[sr][sc]):
+                    return True
+        return False
+
+    def find_legal_moves(self, r, c):
+        if self.board[r][c] is not None:
+            return self.move_index.legal_moves(r, c)
+        moves = []
+        for dr in range(-2, 3):
+            for dc in range(-2, 3):
+                nr, nc = r + dr, c + dc
+                if not self.is_inside(nr, nc) or self.board[nr][nc] is not None:
+                    continue
+                if max(abs(dr), abs(dc)) == 1 and self.can_move_simple(r, c, nr, nc):
+                    moves.append((nr, nc))
+                if max(abs(dr), abs(dc)) == 2 and self.can_capture(r, c, nr, nc):
+                    moves.append((nr, nc))
+        return moves
+
+    def find_all_moves_for_player(self, player, board_state=None):
+        if board_state is None:
+            board_state = self.board
+        moves = []
+        for r in range(GRID_SIZE):
+            for c in range(GRID_SIZE):
+                if board_state[r][c] == player:
+                    for d in self.valid_directions(r, c):
+                        nr, nc = r + d[0], c + d[1]
+                        if self.is_inside(nr, nc) and board_state[nr][nc] is None:
+                            moves.append((r, c, nr, nc, 'move'))
+                    for d in self.valid_directions(r, c):
+                        nr, nc = r + 2 * d[0], c + 2 * d[1]
+                        mr, mc = r + d[0], c + d[1]
+                        if self.is_inside(nr, nc) and board_state[nr][nc] is None:
+                            if self.is_inside(mr, mc) and board_state[mr][mc] == self.opponent(player):
+                                moves.append((r, c, nr, nc, 'capture'))
+        return moves
+
+    def legal_moves(self):
+        """Every move for the side to move (none once the game is over)."""
+        if self.winner:
+            return []
+        return self.find_all_moves_for_player(self.current_player)
+
+    def any_legal_moves_for(self, player):
+        return self.move_index.movable[player] > 0
+
+    def count_pieces(self, player, board_state=None):
+        if board_state is None:
+            return self.move_index.pieces[player]
+        count = 0
+        for r in range(GRID_SIZE):
+            for c in range(GRID_SIZE):
+                if board_state[r][c] == player:
+                    count += 1
+        return count
+
+    def make_move(self, sr, sc, dr, dc):
+        """Play a player's move for the side to move; returns True for a capture.
+
+        After a capture the extra turn belongs to the capturing piece: the
+        turn passes if it has no legal move.
+        """
+        was_capture = self._play(sr, sc, dr, dc)
+        if was_capture:
+            self.extra_turn_after_capture = True
+            if not self.find_legal_moves(dr, dc):
+                self.current_player = self.opponent(self.current_player)
+                self.extra_turn_after_capture = False
+        else:
+            self.current_player = self.opponent(self.current_player)
+            self.extra_turn_after_capture = False
+        self.update_winner()
+        return was_capture
+
+    def apply_move(self, move):
+        """Play an AI move tuple for the side to move; returns True for a capture.
+
+        After a capture the side to move keeps the turn while any of its
+        pieces can move, as the search assumes.
+        """
+        was_capture = self._play(*move[:4])
+        if was_capture:
+            self.extra_turn_after_capture = True
+        else:
+            self.current_player = self.opponent(self.current_player)
+            self.extra_turn_after_capture = False
+        self.update_winner()
+        return was_capture
+
+    def _play(self, sr, sc, dr, dc):
+        was_capture = max(abs(dr - sr), abs(dc - sc)) == 2
+        mid = -1
+        if was_capture:
+            mr, mc = (sr + dr) // 2, (sc + dc) // 2
+            self.board[mr][mc] = None
+            mid = mr * GRID_SIZE + mc
+        self.board[dr][dc] = self.board[sr][sc]
+        self.board[sr][sc] = None
+        if self._move_index is not None:
+            self._move_index.update(sr * GRID_SIZE + sc, dr * GRID_SIZE + dc, mid)
+        return was_capture
+
+    def update_winner(self):
+        """Pass a capture's extra turn if it cannot be used and detect a win.
+
+        Returns the winner ('R' or 'G') or None while the game goes on.
+        """
+        if self.winner:
+            return self.winner
+
+        if self.count_pieces('R') == 0:
+            self.winner = 'G'
+        elif self.count_pieces('G') == 0:
+            self.winner = 'R'
+        elif self.extra_turn_after_capture and not self.any_legal_moves_for(self.current_player):
+            self.current_player = self.opponent(self.current_player)
+            self.extra_turn_after_capture = False
+            if not self.any_legal_moves_for(self.current_player):
+                self.winner = self.opponent(self.current_player)
+        return self.winner
+
+    # ---- AI ----
+
+    def evaluate_board(self, board_state, maximizing_player):
+        if maximizing_player == 'R':
+            mag_pieces = self.count_pieces('R', board_state)
+            green_pieces = self.count_pieces('G', board_state)
+        else:
+            mag_pieces = self.count_pieces('G', board_state)
+            green_pieces = self.count_pieces('R', board_state)
+
+        score = (mag_pieces - green_pieces) * 1000
+
+        mag_captures = 0
+        green_captures = 0
+
+        for r in range(GRID_SIZE):
+            for c in range(GRID_SIZE):
+                if board_state[r][c] == 'R':
+                    for d in self.valid_directions(r, c):
+                        ar, ac = r + d[0], c + d[1]
+                        jr, jc = r + 2 * d[0], c + 2 * d[1]
+                        if self.is_inside(ar, ac) and self.is_inside(jr, jc):
+                            if board_state[ar][ac] == 'G' and board_state[jr][jc] is None:
+                                green_captures += 1
+                elif board_state[r][c] == 'G':
+                    for d in self.valid_directions(r, c):
+                        ar, ac = r + d[0], c + d[1]
+                        jr, jc = r + 2 * d[0], c + 2 * d[1]
+                        if self.is_inside(ar, ac) and self.is_inside(jr, jc):
+                            if board_state[ar][ac] == 'R' and board_state[jr][jc] is None:
+                                mag_captures += 1
+
+        score += (mag_captures - green_captures) * 50
+
+        center_positions = [(2, 2), (1, 2), (2, 1), (2, 3), (3, 2)]
+        for r, c in center_positions:
+            if board_state[r][c] == 'R':
+                score += 10
+            elif board_state[r][c] == 'G':
+                score -= 10
+
+        mag_moves = len(self.find_all_moves_for_player('R', board_state))
+        green_moves = len(self.find_all_moves_for_player('G', board_state))
+        score += (mag_moves - green_moves) * 5
+
+        return score if maximizing_player == 'R' else -score
+
+    def minimax(self, board_state, depth, alpha, beta, maximizing_player, max_player):
+        side = max_player if maximizing_player else self.opponent(max_player)
+        position = bitboard.Position.from_board(board_state, side)
+        searcher = self.searcher
+        searcher.set_player(max_player)
+        alpha = max(alpha, -search.INFINITY)
+        beta = min(beta, search.INFINITY)
+        if maximizing_player:
+            return searcher.negamax(position, depth, alpha, beta)
+        return -searcher.negamax(position, depth, -beta, -alpha)
+
+    def get_best_move_ai(self, board_state, ai_color, difficulty, with_stats=False):
+        """Pick the AI move for ``ai_color`` on ``board_state``.
+
+        With ``with_stats`` the result is ``(move, stats)``, ``stats`` being a
+        ``search.SearchStats`` for this move.  Every move is also appended
+        to ``self.search_log`` as a JSON line when that path is set.
+        """
+        start = time.perf_counter()
+        position = bitboard.Position.from_board(board_state, ai_color)
+        pondered = self.ponder_cache.get(position.key)
+        if pondered and pondered[0] == difficulty and pondered[1] in position.legal_moves():
+            move, stats = pondered[1], pondered[2]
+            if stats.source == "search":
+                stats.source = "ponder"
+        else:
+            stats = search.SearchStats()
+            move = self._choose_move(position, ai_color, difficulty, stats)
+        stats.move = move
+        # A ponder hit keeps the time of the search that found it, so its
+        # nodes per second stay meaningful.
+        if stats.source not in ("search", "ponder"):
+            stats.elapsed = time.perf_counter() - start
+
+        if self.search_log and move is not None:
+            self._log_search(ai_color, difficulty, stats)
+        move = bitboard.move_to_tuple(move) if move is not None else None
+        return (move, stats) if with_stats else move
+
+    def _choose_move(self, position, ai_color, difficulty, stats):
+        moves = position.legal_moves()
+        if not moves:
+            return None
+
+        if difficulty == "Easy":
+            stats.source = "random"
+            capture_moves = [m for m in moves if m[2] >= 0]
+            if capture_moves:
+                return random.choice(capture_moves)
+            return random.choice(moves)
+
+        if difficulty == "MCTS":
+            best_move, _ = self.mcts_searcher.search(
+                position, playouts=self.mcts_playouts,
+                time_limit=self.mcts_time_limit, stats=stats
+            )
+            return best_move
+
+        searcher = self.searcher
+        searcher.set_player(ai_color)
+
+        if difficulty == "Medium":
+            best_move, _ = searcher.search_root(position, MEDIUM_DEPTH, stats=stats)
+            return best_move
+
+        else:  # Hard
+            opponent_pieces = position.count(self.opponent(ai_color))
+            for move in moves:
+                if move[2] >= 0 and opponent_pieces == 1:
+                    stats.source = "shortcut"
+                    return move
+
+            book_entry = self.opening_book.probe(position) if self.opening_book else None
+            if book_entry:
+                stats.source = "book"
+                stats.score = book_entry[1]
+                return book_entry[0]
+
+            if self.tablebase:
+                tablebase_move = self.tablebase.best_move(position)
+                if tablebase_move:
+                    stats.source = "tablebase"
+                    return tablebase_move
+
+            best_move, _, _ = (self.parallel_searcher or searcher).iterative_deepening(
+                position, self.hard_max_depth,
+                time_limit=self.hard_time_limit, node_limit=self.hard_node_limit,
+                stats=stats
+            )
+            return best_move
+
+    def ponder(self, board_state, ai_color, difficulty="Hard"):
+        """Search the AI's answers to the opponent's moves before they happen.
+
+        Meant to run on a worker thread while the opponent of ``ai_color``
+        is to move on ``board_state``.  Each opponent move that hands the
+        turn to the AI is searched with the normal budget, most natural
+        moves first, and the answer is kept in ``ponder_cache``, where
+        ``get_best_move_ai`` finds it.  Everything searched also stays in
+        the transposition table.  Returns when every move is done or
+        ``stop_search`` is called; a search cut short is not cached.
+        """
+        self.ponder_cache = {}
+        if difficulty != "Hard":
+            return
+        opponent = self.opponent(ai_color)
+        position = bitboard.Position.from_board(board_state, opponent)
+
+        replies = []
+        for move in position.legal_moves():
+            position.make_move(move)
+            if position.side == ai_color:
+                replies.append((position.evaluate(opponent), move))
+            position.unmake_move(move)
+        replies.sort(key=lambda reply: reply[0], reverse=True)
+
+        for _, move in replies:
+            child = position.copy()
+            child.make_move(move)
+            if child.key in self.ponder_cache:
+                continue
+            stats = search.SearchStats()
+            try:
+                answer = self._choose_move(child, ai_color, difficulty, stats)
+            except search.SearchTimeout:
+                return
+            if self._search_stopped():
+                return
+            self.ponder_cache[child.key] = (difficulty, answer, stats)
+
+    def _search_stopped(self):
+        if self.parallel_searcher and self.parallel_searcher.stopped:
+            return True
+        return self._searcher is not None and self._searcher.stopped
+
+    def _log_search(self, ai_color, difficulty, stats):
+        record = {"time": time.time(), "player": ai_color, "difficulty": difficulty}
+        record.update(stats.to_dict())
+        try:
+            with open(self.search_log, "a") as f:
+                f.write(json.dumps(record) + "\n")
+        except OSError as e:
+            print("Search log failed:", e)
+
+    def best_move(self, difficulty="Hard"):
+        """AI move for the side to move, or None once the game is over."""
+        if self.winner:
+            return None
+        return self.get_best_move_ai(self.board, self.current_player, difficulty)
+
+    def stop_search(self):
+        """Ask a search running on another thread to give up."""
+        if self._searcher is not None:
+            self._searcher.stop()
+        if self.parallel_searcher:
+            self.parallel_searcher.stop()
+        if self._mcts_searcher is not None:
+            self._mcts_searcher.stop()
+
+    def clear_stop(self):
+        self.searcher.clear_stop()
+        if self.parallel_searcher:
+            self.parallel_searcher.clear_stop()
+        if self._mcts_searcher is not None:
+            self._mcts_searcher.clear_stop()
@@ -5,15 +5,20 @@ import sys
 import json
 import os
 import math
-import random
-import copy
 import configparser
+import threading
+from collections import OrderedDict
+from fractions import Fraction
+
+import bitboard
+import engine
+import opening_book
+import parallel
+import search
+import tablebase
 
 if sys.platform == "win32":
     ctypes.windll.shell32.SetCurrentProcessExplicitAppUserModelID("com.example.BaghBandiGame")
-    
-# Initialize Pygame
-pygame.init()
 
 # Constants
 SCREEN_WIDTH = 900
@@ -23,6 +28,28 @@ BOARD_OFFSET_X = 80
 BOARD_OFFSET_Y = 120
 GRID_SIZE = 5
 CELL_SIZE = BOARD_SIZE // (GRID_SIZE - 1)
+# Worker processes for the Hard AI's root search and the MCTS AI's
+# playouts (1 searches in-process)
+AI_SEARCH_WORKERS = 1
+# Posted by the AI worker thread when its search has finished
+AI_RESULT_EVENT = pygame.USEREVENT + 1
+# JSON-lines file receiving the search statistics of every AI move (None: off)
+SEARCH_LOG_FILE = None
+# Show the last AI move's search statistics on the game screen (F3 toggles)
+SHOW_SEARCH_STATS = False
+# Let the Hard AI search its replies while the human player is thinking
+PONDERING = True
+# Highest frame rate of the main loop, reached only while something
+# animates (None: no cap beyond the display's refresh rate)
+FRAME_CAP = 60
+# Frame rates the animations need
+SELECTION_RING_FPS = 60
+AI_THINKING_FPS = 4
+# Rendered text surfaces kept by the text cache
+TEXT_CACHE_SIZE = 256
+# Half the size of the screen area redrawn when a board point changes
+# (enough for a piece, a move marker and the selection ring)
+CELL_HALF_SIZE = 32
 # Colors
 WHITE = (255, 255, 255)
 BLACK = (0, 0, 0)
@@ -38,6 +65,8 @@ BUTTON_GREEN = (31, 255, 1)
 BUTTON_BLUE = (0, 0, 255)
 BUTTON_ACTIVE_GREEN = (174, 244, 160)
 BUTTON_ACTIVE_BLUE = (150, 200, 255)
+# Game screen background
+BOARD_BACKGROUND = (240, 240, 255)
 
 def resource_path(relative_path):
 
@@ -52,22 +81,121 @@ def resource_path(relative_path):
         raise FileNotFoundError(f"Resource not found: {full_path}")
     return full_path
 
+_fonts = {}
+
+
+def get_font(name, size, bold=False):
+    """``pygame.font.SysFont``, looked up once per name, size and weight."""
+    key = (name, size, bold)
+    font = _fonts.get(key)
+    if font is None:
+        font = _fonts[key] = pygame.font.SysFont(name, size, bold=bold)
+    return font
+
+
+_overlays = {}
+
+
+def get_overlay(size, color):
+    """Translucent ``size`` surface filled with RGBA ``color``, made once per pair."""
+    key = (size, color)
+    overlay = _overlays.get(key)
+    if overlay is None:
+        overlay = _overlays[key] = pygame.Surface(size, pygame.SRCALPHA)
+        overlay.fill(color)
+    return overlay
+
+
+class TextCache:
+    """LRU cache of rendered text surfaces.
+
+    Surfaces are keyed by font (which fixes the face and size), text,
+    colour and outline, so drawing the same label every frame renders it
+    only once.  ``hits`` and ``misses`` count lookups.
+    """
+
+    def __init__(self, max_entries=TEXT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._surfaces = OrderedDict()
+
+    def render(self, font, text, color, outline=None):
+        """Antialiased ``font.render`` of ``text``.
+
+        With ``outline`` as ``(color, thickness)`` the text is drawn over an
+        outline of that colour, on a surface ``thickness`` pixels larger on
+        every side.
+        """
+        key = (font, text, color, outline)
+        surface = self._surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self._surfaces.move_to_end(key)
+            return surface
+
+        self.misses += 1
+        if outline is None:
+            surface = font.render(text, True, color)
+        else:
+            outline_color, thickness = outline
+            border = font.render(text, True, outline_color)
+            width, height = border.get_size()
+            surface = pygame.Surface((width + 2 * thickness, height + 2 * thickness), pygame.SRCALPHA)
+            for dx in range(-thickness, thickness + 1):
+                for dy in range(-thickness, thickness + 1):
+                    if dx != 0 or dy != 0:
+                        surface.blit(border, (thickness + dx, thickness + dy))
+            surface.blit(font.render(text, True, color), (thickness, thickness))
+
+        self._surfaces[key] = surface
+        if len(self._surfaces) > self.max_entries:
+            self._surfaces.popitem(last=False)
+        return surface
+
+    def clear(self):
+        self._surfaces.clear()
+
+
+text_cache = TextCache()
+
+
 class RGBHueRing:
+    """Rainbow ring whose hues rotate by ``speed`` degrees per update.
+
+    The hue offset comes back to zero after ``len(frames)`` updates, so
+    each step of the cycle is rendered once into a transparent surface and
+    every draw after that is a single blit.  The frames are shared by all
+    rings with the same radius, thickness, segment count and speed.
+    """
+
+    # (radius, thickness, segments, speed) -> list of frames, None until rendered
+    _frames = {}
+
     def __init__(self, radius=22, thickness=4, segments=120, speed=4):
         self.radius = radius
         self.thickness = thickness
         self.segments = segments
         self.speed = speed
         self.hue_offset = 0.0
+        self.frame = 0
+        key = (radius, thickness, segments, speed)
+        if key not in RGBHueRing._frames:
+            step = Fraction(speed).limit_denominator(1000) / 360
+            RGBHueRing._frames[key] = [None] * step.denominator
+        self.frames = RGBHueRing._frames[key]
+        # Ring centre inside a frame; the dots reach radius + thickness out
+        self.origin = radius + thickness + 1
 
     def update(self):
-        self.hue_offset = (self.hue_offset + self.speed / 360) % 1.0
+        self.frame = (self.frame + 1) % len(self.frames)
+        self.hue_offset = (self.frame * self.speed / 360) % 1.0
 
-    def draw(self, surface, center):
+    def render(self, surface, center, hue_offset):
         cx, cy = center
         for i in range(self.segments):
             angle = 2 * math.pi * i / self.segments
-            hue = (i / self.segments + self.hue_offset) % 1.0
+            hue = (i / self.segments + hue_offset) % 1.0
 
             r, g, b = colorsys.hsv_to_rgb(hue, 1.0, 1.0)
             color = (int(r * 255), int(g * 255), int(b * 255))
@@ -77,6 +205,15 @@ class RGBHueRing:
 
             pygame.draw.circle(surface, color, (int(x), int(y)), self.thickness)
 
+    def draw(self, surface, center):
+        image = self.frames[self.frame]
+        if image is None:
+            size = 2 * self.origin + 1
+            image = pygame.Surface((size, size), pygame.SRCALPHA)
+            self.render(image, (self.origin, self.origin), self.hue_offset)
+            self.frames[self.frame] = image
+        surface.blit(image, (center[0] - self.origin, center[1] - self.origin))
+
 class Button:
     def __init__(self, x, y, width, height, text, color, active_color, text_color=BLACK, font_size=20):
         self.rect = pygame.Rect(x, y, width, height)
@@ -84,7 +221,7 @@ class Button:
         self.color = color
         self.active_color = active_color
         self.text_color = text_color
-        self.font = pygame.font.SysFont("Arial", font_size)
+        self.font = get_font("Arial", font_size)
         self.is_active = False
         
     def draw(self, screen):
@@ -92,7 +229,7 @@ class Button:
         pygame.draw.rect(screen, color, self.rect, border_radius=5)
         pygame.draw.rect(screen, BLACK, self.rect, 2, border_radius=5)
         
-        text_surf = self.font.render(self.text, True, self.text_color)
+        text_surf = text_cache.render(self.font, self.text, self.text_color)
         text_rect = text_surf.get_rect(center=self.rect.center)
         screen.blit(text_surf, text_rect)
         
@@ -123,7 +260,7 @@ class Dropdown:
         self.hover_color = hover_color
         self.border_color = border_color
 
-        self.font = pygame.font.SysFont("Arial", 16)
+        self.font = get_font("Arial", 16)
         self.option_rects = []
 
         
@@ -133,8 +270,8 @@ class Dropdown:
         pygame.draw.rect(screen, self.border_color, self.rect, 2, border_radius=6)
 
         # Selected text
-        selected_text = self.font.render(
-            self.options[self.selected_index], True, self.fg_color
+        selected_text = text_cache.render(
+            self.font, self.options[self.selected_index], self.fg_color
         )
         screen.blit(selected_text, (self.rect.x + 8, self.rect.y + 7))
 
@@ -154,7 +291,7 @@ class Dropdown:
                 pygame.draw.rect(screen, color, rect)
                 pygame.draw.rect(screen, self.border_color, rect, 1)
 
-                option_text = self.font.render(self.options[i], True, self.fg_color)
+                option_text = text_cache.render(self.font, self.options[i], self.fg_color)
                 screen.blit(option_text, (rect.x + 8, rect.y + 7))
      
     def update_options(self):
@@ -189,6 +326,19 @@ class Dropdown:
     def get_selected(self):
         return self.options[self.selected_index]
 
+    def area(self):
+        """Screen area covered, including the option list when open."""
+        if self.is_open and self.option_rects:
+            return self.rect.unionall(self.option_rects)
+        return self.rect
+
+    def hovered_option(self, pos):
+        if self.is_open:
+            for i, rect in enumerate(self.option_rects):
+                if rect.collidepoint(pos):
+                    return i
+        return None
+
 class ImageButton:
     def __init__(self, x, y, image_path, scale=None):
         self.image = pygame.image.load(image_path).convert_alpha()
@@ -220,20 +370,116 @@ class OutlinedLabel:
 
     def draw(self, surface):
         x, y = self.pos
+        t = self.border_thickness
+
+        # Text over its border (outline), rendered once by the text cache
+        text_surf = text_cache.render(
+            self.font, self.text, self.text_color, (self.border_color, t)
+        )
+        surface.blit(text_surf, (x - t, y - t))
 
-        # Draw border (outline)
-        for dx in range(-self.border_thickness, self.border_thickness + 1):
-            for dy in range(-self.border_thickness, self.border_thickness + 1):
-                if dx != 0 or dy != 0:
-                    border_surf = self.font.render(self.text, True, self.border_color)
-                    surface.blit(border_surf, (x + dx, y + dy))
+class DirtyTracker:
+    """Finds the parts of the screen that changed since the last frame.
 
-        # Draw main text
-        text_surf = self.font.render(self.text, True, self.text_color)
-        surface.blit(text_surf, (x, y))
+    Each frame the screen is described as ``(key, rect, state)`` regions
+    plus a ``screen_state`` for everything that needs a full redraw (the
+    current screen, overlays, the window size).  ``update`` returns the
+    rects to redraw and present: the whole screen when ``screen_state``
+    changed, otherwise the old and new rect of every region whose state
+    changed, and an empty list when nothing did.
+    """
+
+    def __init__(self):
+        self.regions = {}
+        self.screen_state = None
+        self.full = True
+
+    def invalidate(self):
+        self.full = True
+
+    def update(self, screen_rect, screen_state, regions):
+        new = {key: (rect, state) for key, rect, state in regions}
+        old = self.regions
+        self.regions = new
+        if self.full or screen_state != self.screen_state:
+            self.full = False
+            self.screen_state = screen_state
+            return [screen_rect]
+
+        dirty = []
+        for key, (rect, state) in new.items():
+            if key not in old:
+                dirty.append(rect)
+            elif old[key][1] != state:
+                dirty.append(rect)
+                if old[key][0] != rect:
+                    dirty.append(old[key][0])
+        for key in old.keys() - new.keys():
+            dirty.append(old[key][0])
+        return dirty
+
+def display_refresh_rate():
+    """Refresh rate of the desktop display, or None if SDL cannot tell."""
+    try:
+        rates = pygame.display.get_desktop_refresh_rates()
+    except (AttributeError, pygame.error):
+        return None
+    return rates[0] if rates and rates[0] > 0 else None
+
+
+class FramePacer:
+    """Runs the main loop only as fast as the running animations need.
+
+    ``next_events`` is called once per pass of the loop with the running
+    animations, as a dict of name to the frame rate each needs.  It blocks
+    until an event arrives (input, a timer such as the AI's ``USEREVENT``,
+    or an AI result) and returns it with everything else queued.  While
+    animations run the wait also ends when the next frame is due, at the
+    fastest of their rates capped by ``max_fps`` and the display's refresh
+    rate; ``frame_due`` tells the loop to advance them.
+    """
+
+    def __init__(self, max_fps=FRAME_CAP):
+        refresh_rate = display_refresh_rate()
+        if max_fps is None or (refresh_rate and refresh_rate < max_fps):
+            max_fps = refresh_rate
+        self.max_fps = max_fps
+        self.next_frame = 0
+        self.frame_due = False
+
+    def next_events(self, animations):
+        self.frame_due = False
+        if not animations:
+            event = pygame.event.wait()
+            return [event] + pygame.event.get()
+
+        wait = self.next_frame - pygame.time.get_ticks()
+        if wait > 0:
+            event = pygame.event.wait(wait)
+            if event.type != pygame.NOEVENT:
+                return [event] + pygame.event.get()
+
+        fps = max(animations.values())
+        if self.max_fps:
+            fps = min(fps, self.max_fps)
+        self.next_frame = pygame.time.get_ticks() + 1000 // fps
+        self.frame_due = True
+        return pygame.event.get()
+
+def _game_state(name):
+    # The front end keeps its old attribute names for state owned by self.game.
+    return property(
+        lambda self: getattr(self.game, name),
+        lambda self, value: setattr(self.game, name, value)
+    )
 
 class BaghChalPygame:
+    board = _game_state("board")
+    current_player = _game_state("current_player")
+    extra_turn_after_capture = _game_state("extra_turn_after_capture")
+
     def __init__(self):
+        pygame.init()
         self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
         pygame.display.set_caption("Bagh Bandi Game - By SouRav")
         
@@ -241,11 +487,9 @@ class BaghChalPygame:
         pygame.display.set_icon(icon)
 
         # Game state
-        self.board = [[None for _ in range(GRID_SIZE)] for _ in range(GRID_SIZE)]
+        self.game = engine.Game()
         self.selected = None
         self.legal_moves = []
-        self.current_player = 'R'
-        self.extra_turn_after_capture = False
         self.game_message = None
         self.game_message_active = False
         
@@ -253,6 +497,22 @@ class BaghChalPygame:
         self.ai_player = None
         self.ai_difficulty = "Easy"
         self.ai_thinking = False
+        self.ai_thread = None
+        self.ai_generation = 0
+        self.ponder_thread = None
+        self.last_search_stats = None
+        self.show_search_stats = SHOW_SEARCH_STATS
+        # Pre-rendered background, header and board lines of the game screen
+        self.board_layer = None
+        self.board_layer_key = None
+        self.dirty_tracker = DirtyTracker()
+        self.game.search_log = SEARCH_LOG_FILE
+        self.game.mcts_workers = AI_SEARCH_WORKERS
+        if AI_SEARCH_WORKERS > 1:
+            self.game.parallel_searcher = parallel.ParallelSearcher(
+                AI_SEARCH_WORKERS,
+                tablebase_path=resource_path(tablebase.TABLEBASE_FILE)
+            )
         
         # Game modes
         self.game_mode = "splash"  # splash, mode_select, playing
@@ -285,6 +545,8 @@ class BaghChalPygame:
         self.selection_ring = RGBHueRing(radius=22, thickness=3, segments=140, speed=6)
         pygame.mixer.init()
         self.load_sounds()
+        self.load_opening_book()
+        self.load_tablebase()
     
     def is_saved_game_playable(self):
         """Return True only if saved game exists AND both players still have pieces"""
@@ -323,6 +585,22 @@ class BaghChalPygame:
             self.sound_ai_capture = None
             self.sound_player_capture = None
 
+    def load_opening_book(self):
+        try:
+            self.game.opening_book = engine.load_opening_book(
+                resource_path(opening_book.BOOK_FILE)
+            )
+        except Exception as e:
+            print("Opening book load failed:", e)
+            self.game.opening_book = None
+
+    def load_tablebase(self):
+        try:
+            self.game.tablebase = engine.load_tablebase(resource_path(tablebase.TABLEBASE_FILE))
+        except Exception as e:
+            print("Tablebase load failed:", e)
+            self.game.tablebase = None
+
     def load_images(self):
         # Load background image
         try:
@@ -340,7 +618,7 @@ class BaghChalPygame:
             # Create text surface if image not found
             self.text_image = pygame.Surface((500, 130))
             self.text_image.fill((255, 255, 255))
-            font = pygame.font.SysFont("Arial", 70, bold=True)
+            font = get_font("Arial", 70, bold=True)
             text = font.render("BAGH BANDI", True, RED)
             self.text_image.blit(text, (50, 30))
         try:
@@ -404,7 +682,7 @@ class BaghChalPygame:
 
         self.dropdowns["difficulty"] = Dropdown(
             380, 440, 200, 32,
-            ["Easy", "Medium", "Hard"],
+            ["Easy", "Medium", "Hard", "MCTS"],
             bg_color=(30, 30, 30),
             fg_color=(0, 255, 180),
             hover_color=(50, 50, 50),
@@ -455,16 +733,7 @@ class BaghChalPygame:
         )
 
     def init_board(self):
-        idx = 0
-        for r in range(GRID_SIZE):
-            for c in range(GRID_SIZE):
-                if idx < 10:
-                    self.board[r][c] = 'R'
-                elif idx >= 15:
-                    self.board[r][c] = 'G'
-                else:
-                    self.board[r][c] = None
-                idx += 1
+        self.game.reset()
     
     def cell_to_coord(self, r, c):
         x = BOARD_OFFSET_X + c * CELL_SIZE
@@ -486,123 +755,40 @@ class BaghChalPygame:
         return None
     
     def opponent(self, player):
-        return 'G' if player == 'R' else 'R'
-    
-    def is_inside(self, r, c):
-        return 0 <= r < GRID_SIZE and 0 <= c < GRID_SIZE
-    
-    def valid_directions(self, r, c):
-        dirs = [(-1, 0), (1, 0), (0, -1), (0, 1)]
-        if (r + c) % 2 == 0:
-            dirs += [(-1, -1), (-1, 1), (1, -1), (1, 1)]
-        return dirs
-    
-    def can_move_simple(self, sr, sc, dr, dc):
-        if not self.is_inside(dr, dc) or self.board[dr][dc] is not None:
-            return False
-        for d in self.valid_directions(sr, sc):
-            if sr + d[0] == dr and sc + d[1] == dc:
-                return True
-        return False
-    
-    def can_capture(self, sr, sc, dr, dc):
-        if not self.is_inside(dr, dc) or self.board[dr][dc] is not None:
-            return False
-        for d in self.valid_directions(sr, sc):
-            mid_r, mid_c = sr + d[0], sc + d[1]
-            end_r, end_c = sr + 2 * d[0], sc + 2 * d[1]
-            if (end_r, end_c) == (dr, dc):
-                if self.is_inside(mid_r, mid_c) and self.board[mid_r][mid_c] == self.opponent(self.board[sr][sc]):
-                    return True
-        return False
+        return self.game.opponent(player)
     
     def find_legal_moves(self, r, c):
-        moves = []
-        for dr in range(-2, 3):
-            for dc in range(-2, 3):
-                nr, nc = r + dr, c + dc
-                if not self.is_inside(nr, nc) or self.board[nr][nc] is not None:
-                    continue
-                if max(abs(dr), abs(dc)) == 1 and self.can_move_simple(r, c, nr, nc):
-                    moves.append((nr, nc))
-                if max(abs(dr), abs(dc)) == 2 and self.can_capture(r, c, nr, nc):
-                    moves.append((nr, nc))
-        return moves
-    
-    def find_all_moves_for_player(self, player, board_state):
-        moves = []
-        for r in range(GRID_SIZE):
-            for c in range(GRID_SIZE):
-                if board_state[r][c] == player:
-                    for d in self.valid_directions(r, c):
-                        nr, nc = r + d[0], c + d[1]
-                        if self.is_inside(nr, nc) and board_state[nr][nc] is None:
-                            moves.append((r, c, nr, nc, 'move'))
-                    for d in self.valid_directions(r, c):
-                        nr, nc = r + 2 * d[0], c + 2 * d[1]
-                        mr, mc = r + d[0], c + d[1]
-                        if self.is_inside(nr, nc) and board_state[nr][nc] is None:
-                            if self.is_inside(mr, mc) and board_state[mr][mc] == self.opponent(player):
-                                moves.append((r, c, nr, nc, 'capture'))
-        return moves
+        return self.game.find_legal_moves(r, c)
     
     def any_legal_moves_for(self, player):
-        for r in range(GRID_SIZE):
-            for c in range(GRID_SIZE):
-                if self.board[r][c] == player:
-                    if self.find_legal_moves(r, c):
-                        return True
-        return False
+        return self.game.any_legal_moves_for(player)
     
     def count_pieces(self, player, board_state=None):
-        if board_state is None:
-            board_state = self.board
-        count = 0
-        for r in range(GRID_SIZE):
-            for c in range(GRID_SIZE):
-                if board_state[r][c] == player:
-                    count += 1
-        return count
+        return self.game.count_pieces(player, board_state)
     
     def make_move(self, sr, sc, dr, dc):
-        was_capture = False
-
-        if abs(dr - sr) <= 1 and abs(dc - sc) <= 1:
-            self.board[dr][dc] = self.board[sr][sc]
-            self.board[sr][sc] = None
-            self.selected = None
-            self.legal_moves = []
-            self.current_player = self.opponent(self.current_player)
-            self.extra_turn_after_capture = False
-        else:
-            mid_r = (sr + dr) // 2
-            mid_c = (sc + dc) // 2
-
-            captured_piece = self.board[mid_r][mid_c]   # 👈 important
-            self.board[mid_r][mid_c] = None
-            self.board[dr][dc] = self.board[sr][sc]
-            self.board[sr][sc] = None
-            was_capture = True
+        mover = self.current_player
+        was_capture = self.game.make_move(sr, sc, dr, dc)
+        self.selected = None
+        self.legal_moves = []
 
+        if was_capture:
             # 🔊 SOUND LOGIC
             if self.mode == "Play with Friend":
                 if self.sound_friend_capture:
                     self.sound_friend_capture.play()
 
             elif self.mode == "Play with AI":
-                # Player captured AI
-                if self.current_player != self.ai_player:
+                # Player captured AI (the turn may have passed already)
+                if mover != self.ai_player:
                     if self.sound_player_capture:
                         self.sound_player_capture.play()
 
-            self.selected = (dr, dc)
-            self.legal_moves = self.find_legal_moves(dr, dc)
-            self.extra_turn_after_capture = True
-
-            if not self.legal_moves:
-                self.selected = None
-                self.extra_turn_after_capture = False
-                self.current_player = self.opponent(self.current_player)
+            # Keep the capturing piece selected for the extra turn
+            if self.extra_turn_after_capture:
+                self.legal_moves = self.find_legal_moves(dr, dc)
+                if self.legal_moves:
+                    self.selected = (dr, dc)
 
         self.post_move_updates()
 
@@ -610,40 +796,23 @@ class BaghChalPygame:
             self.current_player == self.ai_player and 
             not self.extra_turn_after_capture):
             pygame.time.set_timer(pygame.USEREVENT, 500)  # Trigger AI move after delay
+        else:
+            self.start_pondering()
     
     def post_move_updates(self):
-        mag_count = self.count_pieces('R')
-        green_count = self.count_pieces('G')
-        
-        if mag_count == 0:
-            self.show_message("Green wins!")
-            return
-        
-        if green_count == 0:
-            self.show_message("Red wins!")
-            return
-        
-        if not self.any_legal_moves_for(self.current_player):
-            if self.extra_turn_after_capture:
-                self.current_player = self.opponent(self.current_player)
-                self.extra_turn_after_capture = False
-                if not self.any_legal_moves_for(self.current_player):
-                    winner = "Green" if self.current_player == 'R' else "Red"
-                    self.show_message(f"{winner} wins!")
-                    return
+        winner = self.game.update_winner()
+        if winner:
+            self.show_message(f"{'Red' if winner == 'R' else 'Green'} wins!")
     
     def draw_game_message(self):
         if not self.game_message_active:
             return
 
-        font = pygame.font.SysFont("Arial", 90, bold=True)
-        text = font.render(self.game_message, True, RED)
+        font = get_font("Arial", 90, bold=True)
+        text = text_cache.render(font, self.game_message, RED)
         text_rect = text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 4))
 
-        overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-        overlay.fill((0, 0, 0, 160))
-
-        self.screen.blit(overlay, (0, 0))
+        self.screen.blit(get_overlay((SCREEN_WIDTH, SCREEN_HEIGHT), (0, 0, 0, 160)), (0, 0))
         self.screen.blit(text, text_rect)
 
         # ---- DRAW GAME OVER BUTTONS ----
@@ -661,240 +830,99 @@ class BaghChalPygame:
         self.game_message = message
         self.game_message_active = True
     
-    def evaluate_board(self, board_state, maximizing_player):
-        if maximizing_player == 'R':
-            mag_pieces = self.count_pieces('R', board_state)
-            green_pieces = self.count_pieces('G', board_state)
-        else:
-            mag_pieces = self.count_pieces('G', board_state)
-            green_pieces = self.count_pieces('R', board_state)
-        
-        score = (mag_pieces - green_pieces) * 1000
-        
-        mag_captures = 0
-        green_captures = 0
-        
-        for r in range(GRID_SIZE):
-            for c in range(GRID_SIZE):
-                if board_state[r][c] == 'R':
-                    for d in self.valid_directions(r, c):
-                        ar, ac = r + d[0], c + d[1]
-                        jr, jc = r + 2 * d[0], c + 2 * d[1]
-                        if self.is_inside(ar, ac) and self.is_inside(jr, jc):
-                            if board_state[ar][ac] == 'G' and board_state[jr][jc] is None:
-                                green_captures += 1
-                elif board_state[r][c] == 'G':
-                    for d in self.valid_directions(r, c):
-                        ar, ac = r + d[0], c + d[1]
-                        jr, jc = r + 2 * d[0], c + 2 * d[1]
-                        if self.is_inside(ar, ac) and self.is_inside(jr, jc):
-                            if board_state[ar][ac] == 'R' and board_state[jr][jc] is None:
-                                mag_captures += 1
-        
-        score += (mag_captures - green_captures) * 50
-        
-        center_positions = [(2, 2), (1, 2), (2, 1), (2, 3), (3, 2)]
-        for r, c in center_positions:
-            if board_state[r][c] == 'R':
-                score += 10
-            elif board_state[r][c] == 'G':
-                score -= 10
-        
-        mag_moves = len(self.find_all_moves_for_player('R', board_state))
-        green_moves = len(self.find_all_moves_for_player('G', board_state))
-        score += (mag_moves - green_moves) * 5
-        
-        return score if maximizing_player == 'R' else -score
-    
-    def minimax(self, board_state, depth, alpha, beta, maximizing_player, max_player):
-        mag_count = self.count_pieces('R', board_state)
-        green_count = self.count_pieces('G', board_state)
-        
-        if mag_count == 0:
-            return -10000 + depth if max_player == 'R' else 10000 - depth
-        if green_count == 0:
-            return 10000 - depth if max_player == 'R' else -10000 + depth
-        
-        if depth == 0:
-            return self.evaluate_board(board_state, max_player)
-        
-        current_player_turn = max_player if maximizing_player else self.opponent(max_player)
-        moves = self.find_all_moves_for_player(current_player_turn, board_state)
-        
-        if not moves:
-            return -5000 if maximizing_player else 5000
-        
-        if maximizing_player:
-            max_eval = -float('inf')
-            for move in moves:
-                new_board = copy.deepcopy(board_state)
-                sr, sc, dr, dc, move_type = move
-                
-                if move_type == 'move':
-                    new_board[dr][dc] = new_board[sr][sc]
-                    new_board[sr][sc] = None
-                else:
-                    mid_r = (sr + dr) // 2
-                    mid_c = (sc + dc) // 2
-                    new_board[dr][dc] = new_board[sr][sc]
-                    new_board[sr][sc] = None
-                    new_board[mid_r][mid_c] = None
-                
-                eval_score = self.minimax(new_board, depth - 1, alpha, beta, False, max_player)
-                max_eval = max(max_eval, eval_score)
-                alpha = max(alpha, eval_score)
-                if beta <= alpha:
-                    break
-            return max_eval
-        else:
-            min_eval = float('inf')
-            for move in moves:
-                new_board = copy.deepcopy(board_state)
-                sr, sc, dr, dc, move_type = move
-                
-                if move_type == 'move':
-                    new_board[dr][dc] = new_board[sr][sc]
-                    new_board[sr][sc] = None
-                else:
-                    mid_r = (sr + dr) // 2
-                    mid_c = (sc + dc) // 2
-                    new_board[dr][dc] = new_board[sr][sc]
-                    new_board[sr][sc] = None
-                    new_board[mid_r][mid_c] = None
-                
-                eval_score = self.minimax(new_board, depth - 1, alpha, beta, True, max_player)
-                min_eval = min(min_eval, eval_score)
-                beta = min(beta, eval_score)
-                if beta <= alpha:
-                    break
-            return min_eval
-    
-    def get_best_move_ai(self, board_state, ai_color, difficulty):
-        moves = self.find_all_moves_for_player(ai_color, board_state)
-        if not moves:
-            return None
-        
-        if difficulty == "Easy":
-            capture_moves = [m for m in moves if m[4] == 'capture']
-            if capture_moves:
-                return random.choice(capture_moves)
-            return random.choice(moves)
-        
-        elif difficulty == "Medium":
-            depth = 2
-            best_move = None
-            best_value = -float('inf')
-            
-            for move in moves:
-                new_board = copy.deepcopy(board_state)
-                sr, sc, dr, dc, move_type = move
-                
-                if move_type == 'move':
-                    new_board[dr][dc] = new_board[sr][sc]
-                    new_board[sr][sc] = None
-                else:
-                    mid_r = (sr + dr) // 2
-                    mid_c = (sc + dc) // 2
-                    new_board[dr][dc] = new_board[sr][sc]
-                    new_board[sr][sc] = None
-                    new_board[mid_r][mid_c] = None
-                
-                move_value = self.minimax(new_board, depth - 1, -float('inf'), float('inf'), False, ai_color)
-                
-                if move_value > best_value:
-                    best_value = move_value
-                    best_move = move
-            
-            return best_move
-        
-        else:  # Hard
-            depth = 4
-            best_move = None
-            best_value = -float('inf')
-            
-            for move in moves:
-                if move[4] == 'capture':
-                    new_board = copy.deepcopy(board_state)
-                    sr, sc, dr, dc, move_type = move
-                    mid_r = (sr + dr) // 2
-                    mid_c = (sc + dc) // 2
-                    new_board[dr][dc] = new_board[sr][sc]
-                    new_board[sr][sc] = None
-                    new_board[mid_r][mid_c] = None
-                    
-                    opponent_pieces = self.count_pieces(self.opponent(ai_color), new_board)
-                    if opponent_pieces == 0:
-                        return move
-            
-            for current_depth in range(1, depth + 1):
-                current_best_move = None
-                current_best_value = -float('inf')
-                
-                for move in moves:
-                    new_board = copy.deepcopy(board_state)
-                    sr, sc, dr, dc, move_type = move
-                    
-                    if move_type == 'move':
-                        new_board[dr][dc] = new_board[sr][sc]
-                        new_board[sr][sc] = None
-                    else:
-                        mid_r = (sr + dr) // 2
-                        mid_c = (sc + dc) // 2
-                        new_board[dr][dc] = new_board[sr][sc]
-                        new_board[sr][sc] = None
-                        new_board[mid_r][mid_c] = None
-                    
-                    move_value = self.minimax(new_board, current_depth - 1, -float('inf'), float('inf'), False, ai_color)
-                    
-                    if move_value > current_best_value:
-                        current_best_value = move_value
-                        current_best_move = move
-                
-                best_move = current_best_move
-                best_value = current_best_value
-            
-            if best_move is None and moves:
-                capture_moves = [m for m in moves if m[4] == 'capture']
-                if capture_moves:
-                    best_move = random.choice(capture_moves)
-                else:
-                    best_move = random.choice(moves)
-            
-            return best_move
-    
+    def get_best_move_ai(self, board_state, ai_color, difficulty, with_stats=False):
+        return self.game.get_best_move_ai(board_state, ai_color, difficulty, with_stats)
+
     def ai_move(self):
-        if self.ai_thinking or self.current_player != self.ai_player:
+        """Start the AI search on a worker thread.
+
+        The result comes back as an AI_RESULT_EVENT and is played by
+        apply_ai_move, so the render loop keeps running while the AI thinks.
+        """
+        if self.ai_thinking or self.current_player != self.ai_player or self.game.winner:
             return
-        
+
+        self.stop_pondering()
         self.ai_thinking = True
-        
-        best_move = self.get_best_move_ai(self.board, self.ai_player, self.ai_difficulty)
-        
-        if best_move:
-            sr, sc, dr, dc, move_type = best_move
-            was_capture = (move_type == 'capture')
-            
-            if move_type == 'move':
-                self.board[dr][dc] = self.board[sr][sc]
-                self.board[sr][sc] = None
-            else:
-                mid_r = (sr + dr) // 2
-                mid_c = (sc + dc) // 2
+        self.ai_generation += 1
+        self.game.clear_stop()
+
+        board = [row[:] for row in self.board]
+        self.ai_thread = threading.Thread(
+            target=self.run_ai_search,
+            args=(board, self.ai_player, self.ai_difficulty, self.ai_generation),
+            daemon=True
+        )
+        self.ai_thread.start()
+
+    def run_ai_search(self, board, ai_player, difficulty, generation):
+        stats = None
+        try:
+            best_move, stats = self.get_best_move_ai(board, ai_player, difficulty, with_stats=True)
+        except search.SearchTimeout:
+            best_move = None
+        except Exception as e:
+            print("AI search failed:", e)
+            best_move = None
 
-                self.board[mid_r][mid_c] = None
-                self.board[dr][dc] = self.board[sr][sc]
-                self.board[sr][sc] = None
+        pygame.event.post(pygame.event.Event(
+            AI_RESULT_EVENT, move=best_move, stats=stats, generation=generation
+        ))
 
-                # 🔊 AI captured player
-                if self.sound_ai_capture:
-                    self.sound_ai_capture.play()
+    def cancel_ai_search(self):
+        """Stop any pending or running AI move and drop its result."""
+        pygame.time.set_timer(pygame.USEREVENT, 0)
+        self.ai_generation += 1
 
-            
-            if was_capture:
-                self.extra_turn_after_capture = True
-            else:
-                self.current_player = self.opponent(self.ai_player)
-                self.extra_turn_after_capture = False
+        if self.ai_thread is not None and self.ai_thread.is_alive():
+            self.game.stop_search()
+            self.ai_thread.join()
+        self.ai_thread = None
+        self.ai_thinking = False
+        self.stop_pondering()
+
+    def start_pondering(self):
+        """Search the AI's replies on a worker thread during the human's turn."""
+        if (not PONDERING or self.mode != "Play with AI" or self.ai_difficulty != "Hard"
+                or self.ai_thinking or self.game.winner
+                or self.current_player == self.ai_player):
+            return
+
+        self.stop_pondering()
+        self.game.clear_stop()
+        board = [row[:] for row in self.board]
+        self.ponder_thread = threading.Thread(
+            target=self.run_ponder,
+            args=(board, self.ai_player, self.ai_difficulty),
+            daemon=True
+        )
+        self.ponder_thread.start()
+
+    def run_ponder(self, board, ai_player, difficulty):
+        try:
+            self.game.ponder(board, ai_player, difficulty)
+        except Exception as e:
+            print("Pondering failed:", e)
+
+    def stop_pondering(self):
+        if self.ponder_thread is not None and self.ponder_thread.is_alive():
+            self.game.stop_search()
+            self.ponder_thread.join()
+        self.ponder_thread = None
+
+    def apply_ai_move(self, best_move, stats=None):
+        self.ai_thinking = False
+        self.ai_thread = None
+        if stats is not None:
+            self.last_search_stats = stats
+
+        if best_move:
+            move_type = best_move[4]
+            self.game.apply_move(best_move)
+
+            # 🔊 AI captured player
+            if move_type == 'capture' and self.sound_ai_capture:
+                self.sound_ai_capture.play()
             
             self.post_move_updates()
             
@@ -902,28 +930,49 @@ class BaghChalPygame:
                 pygame.time.set_timer(pygame.USEREVENT, 500)
             elif self.mode == "Play with AI" and self.current_player == self.ai_player:
                 pygame.time.set_timer(pygame.USEREVENT, 500)
-        
-        self.ai_thinking = False
+            else:
+                self.start_pondering()
     
-    def draw_board(self):
-       # Draw grid lines
+    def get_board_layer(self, mode_text):
+        """Background, header text and board lines, rendered once.
+
+        Rebuilt only when the window size, background colour or header
+        text changes, or after ``invalidate_board_layer``.
+        """
+        key = (self.screen.get_size(), BOARD_BACKGROUND, mode_text)
+        if self.board_layer is None or self.board_layer_key != key:
+            layer = pygame.Surface(self.screen.get_size()).convert()
+            layer.fill(BOARD_BACKGROUND)
+            font = get_font("Arial", 20, bold=True)
+            layer.blit(text_cache.render(font, mode_text, BLACK), (20, 10))
+            self.draw_board_lines(layer)
+            self.board_layer = layer
+            self.board_layer_key = key
+        return self.board_layer
+
+    def invalidate_board_layer(self):
+        """Force the static board to be redrawn, e.g. after a theme change."""
+        self.board_layer = None
+
+    def draw_board_lines(self, surface):
+        # Draw grid lines
         for i in range(GRID_SIZE):
             # Vertical lines
             x = BOARD_OFFSET_X + i * CELL_SIZE
-            pygame.draw.line(self.screen, BLACK, 
+            pygame.draw.line(surface, BLACK, 
                            (x, BOARD_OFFSET_Y), 
                            (x, BOARD_OFFSET_Y + BOARD_SIZE), 3)
             # Horizontal lines
             y = BOARD_OFFSET_Y + i * CELL_SIZE
-            pygame.draw.line(self.screen, BLACK, 
+            pygame.draw.line(surface, BLACK, 
                            (BOARD_OFFSET_X, y), 
                            (BOARD_OFFSET_X + BOARD_SIZE, y), 3)
         
         # Draw diagonal lines
-        pygame.draw.line(self.screen, BLACK,
+        pygame.draw.line(surface, BLACK,
                         (BOARD_OFFSET_X, BOARD_OFFSET_Y),
                         (BOARD_OFFSET_X + BOARD_SIZE, BOARD_OFFSET_Y + BOARD_SIZE), 3)
-        pygame.draw.line(self.screen, BLACK,
+        pygame.draw.line(surface, BLACK,
                         (BOARD_OFFSET_X, BOARD_OFFSET_Y + BOARD_SIZE),
                         (BOARD_OFFSET_X + BOARD_SIZE, BOARD_OFFSET_Y), 3)
         
@@ -937,13 +986,16 @@ class BaghChalPygame:
             [(center_x, BOARD_OFFSET_Y + BOARD_SIZE), (BOARD_OFFSET_X, center_y)]
         ]
         for p1, p2 in points:
-            pygame.draw.line(self.screen, BLACK, p1, p2, 3)
+            pygame.draw.line(surface, BLACK, p1, p2, 3)
         
         # Draw grid points
         for r in range(GRID_SIZE):
             for c in range(GRID_SIZE):
                 x, y = self.cell_to_coord(r, c)
-                pygame.draw.circle(self.screen, BLACK, (int(x), int(y)), 4)
+                pygame.draw.circle(surface, BLACK, (int(x), int(y)), 4)
+
+    def draw_board(self):
+        # Grid lines and points are part of the board layer
         
         # Draw legal moves
         for mr, mc in self.legal_moves:
@@ -976,7 +1028,85 @@ class BaghChalPygame:
                 x, y = self.cell_to_coord(sr, sc)
                 self.selection_ring.draw(self.screen, (int(x), int(y)))
     
+    def screen_regions(self, mouse_pos):
+        """``(screen_state, regions)`` of this frame for the ``DirtyTracker``."""
+        regions = []
+
+        def hover(name):
+            rect = self.buttons[name].rect
+            regions.append((name, rect, rect.collidepoint(mouse_pos)))
+
+        screen_state = (self.game_mode, self.show_mode_selection, self.screen.get_size(),
+                        self.saved_game_exists, self.game_message_active, self.game_message)
+        if self.game_mode == "splash":
+            if not self.show_mode_selection:
+                hover("continue")
+                hover("new_game")
+            else:
+                names = ["mode"]
+                if self.dropdowns["mode"].get_selected() == "Play with AI":
+                    names += ["ai_color", "difficulty"]
+                screen_state += (len(names),)
+                for name in names:
+                    dropdown = self.dropdowns[name]
+                    regions.append((name, dropdown.area(), (
+                        dropdown.is_open, dropdown.selected_index,
+                        dropdown.hovered_option(mouse_pos)
+                    )))
+                hover("start")
+                hover("back")
+
+        elif self.game_mode == "playing":
+            header = (self.mode, self.ai_color, self.ai_difficulty, self.current_player,
+                      self.extra_turn_after_capture, self.count_pieces('R'), self.count_pieces('G'))
+            regions.append(("header", pygame.Rect(0, 0, SCREEN_WIDTH, 90), header))
+            for r in range(GRID_SIZE):
+                for c in range(GRID_SIZE):
+                    x, y = self.cell_to_coord(r, c)
+                    ring = self.selection_ring.hue_offset if self.selected == (r, c) else None
+                    regions.append((
+                        (r, c),
+                        pygame.Rect(x - CELL_HALF_SIZE, y - CELL_HALF_SIZE,
+                                    2 * CELL_HALF_SIZE, 2 * CELL_HALF_SIZE),
+                        (self.board[r][c], (r, c) in self.legal_moves, ring)
+                    ))
+            regions.append(("thinking", pygame.Rect(SCREEN_WIDTH//2 - 80, SCREEN_HEIGHT - 40, 200, 32),
+                            self.ai_thinking_text()))
+            if self.show_search_stats:
+                regions.append(("stats", pygame.Rect(SCREEN_WIDTH - 370, 55, 360, 18 * 12 + 8),
+                                id(self.last_search_stats)))
+            if self.game_message_active:
+                hover("replay")
+                hover("game_home")
+        return screen_state, regions
+
+    def ai_thinking_text(self):
+        """The AI thinking indicator, its dots cycling, or None."""
+        if not self.ai_thinking:
+            return None
+        dots = 1 + pygame.time.get_ticks() * AI_THINKING_FPS // 1000 % 3
+        return "AI is thinking" + "." * dots
+
+    def animations(self):
+        """Running animations and the frame rate each needs, for the pacer."""
+        running = {}
+        if self.game_mode == "playing":
+            if self.selected is not None:
+                running["selection_ring"] = SELECTION_RING_FPS
+            if self.ai_thinking:
+                running["ai_thinking"] = AI_THINKING_FPS
+        return running
+
+    def draw_frame(self):
+        if self.game_mode == "splash":
+            self.draw_splash_screen()
+        elif self.game_mode == "mode_select":
+            self.draw_game_mode_screen()
+        elif self.game_mode == "playing":
+            self.draw_game_screen()
+
     def home_to_splash(self):
+        self.cancel_ai_search()
         self.save_game_state()
         self.game_mode = "splash"
         self.show_mode_selection = False
@@ -984,7 +1114,6 @@ class BaghChalPygame:
         self.legal_moves = []
         # self.current_player = 'R'
         # self.extra_turn_after_capture = False
-        self.ai_thinking = False
         # self.init_board()
         
     def draw_splash_screen(self):
@@ -1002,15 +1131,14 @@ class BaghChalPygame:
             
             # Show continue button only if saved game exists
             if not self.saved_game_exists:
-                overlay = pygame.Surface((200, 50), pygame.SRCALPHA)
-                overlay.fill((128, 128, 128, 128))
-                self.screen.blit(overlay, self.buttons["continue"].rect.topleft)
+                self.screen.blit(get_overlay((200, 50), (128, 128, 128, 128)),
+                                 self.buttons["continue"].rect.topleft)
         else:
             # Draw mode selection UI
             self.draw_mode_selection_on_splash()
     
     def draw_mode_selection_on_splash(self):
-        font = pygame.font.SysFont("Arial", 40, bold=True)
+        font = get_font("Arial", 40, bold=True)
 
         start_y = 220
         gap = 100
@@ -1053,26 +1181,28 @@ class BaghChalPygame:
             )
             difficulty_label.draw(self.screen)
 
-            self.dropdowns["ai_color"].draw(self.screen)
-            self.dropdowns["difficulty"].draw(self.screen)
-
         # ---- START BUTTON ----
         mouse_pos = pygame.mouse.get_pos()
         self.buttons["start"].check_hover(mouse_pos)
         self.buttons["start"].draw(self.screen)
         self.buttons["back"].check_hover(mouse_pos)
         self.buttons["back"].draw(self.screen)
+
+        # Drawn last: the open difficulty list reaches down over Start
+        if self.dropdowns["mode"].get_selected() == "Play with AI":
+            self.dropdowns["ai_color"].draw(self.screen)
+            self.dropdowns["difficulty"].draw(self.screen)
         
     def draw_game_mode_screen(self):
         self.screen.fill((240, 240, 255))
         
         # Draw labels
-        font = pygame.font.SysFont("Arial", 20)
+        font = get_font("Arial", 20)
         labels = ["Mode:", "AI Color:", "AI Difficulty:"]
         positions = [70, 270, 470]
         
         for label, x in zip(labels, positions):
-            text = font.render(label, True, BLACK)
+            text = text_cache.render(font, label, BLACK)
             self.screen.blit(text, (x, 25))
         
         # Draw dropdowns
@@ -1085,30 +1215,27 @@ class BaghChalPygame:
         self.buttons["start"].draw(self.screen)
     
     def draw_game_screen(self):
-        self.screen.fill((240, 240, 255))
-        
-        # Draw top panel with game info
-        font = pygame.font.SysFont("Arial", 20, bold=True)
-        
-        # Draw mode info
+        # Draw mode info and the board lines from the cached layer
         mode_text = f"Mode: {self.mode}"
         if self.mode == "Play with AI":
             mode_text += f" | AI: {self.ai_color} ({self.ai_difficulty})"
-        text = font.render(mode_text, True, BLACK)
-        self.screen.blit(text, (20, 10))
+        self.screen.blit(self.get_board_layer(mode_text), (0, 0))
+
+        # Draw top panel with game info
+        font = get_font("Arial", 20, bold=True)
         
         # Draw player turn
         player_text = f"Turn: {'Red' if self.current_player == 'R' else 'Green'}"
         if self.extra_turn_after_capture:
             player_text += " (Extra Turn after Capture!)"
-        text = font.render(player_text, True, BLACK)
+        text = text_cache.render(font, player_text, BLACK)
         self.screen.blit(text, (20, 35))
         
         # Draw piece counts
         mag_count = self.count_pieces('R')
         green_count = self.count_pieces('G')
         count_text = f"Red: {mag_count} | Green: {green_count}"
-        text = font.render(count_text, True, BLACK)
+        text = text_cache.render(font, count_text, BLACK)
         self.screen.blit(text, (20, 60))
         
         # Draw board
@@ -1117,11 +1244,42 @@ class BaghChalPygame:
         self.buttons["home"].draw(self.screen)
         
         # Draw AI thinking indicator
-        if self.ai_thinking:
-            font = pygame.font.SysFont("Arial", 24)
-            text = font.render("AI is thinking...", True, RED)
+        thinking_text = self.ai_thinking_text()
+        if thinking_text:
+            font = get_font("Arial", 24)
+            text = text_cache.render(font, thinking_text, RED)
             self.screen.blit(text, (SCREEN_WIDTH//2 - 80, SCREEN_HEIGHT - 40))
+        if self.show_search_stats:
+            self.draw_search_stats()
         self.draw_game_message() 
+
+    def draw_search_stats(self):
+        """Debug overlay with the statistics of the last AI move."""
+        stats = self.last_search_stats
+        if stats is None:
+            lines = ["No AI move yet"]
+        else:
+            lines = [
+                f"{stats.source}  depth {stats.depth}  score {stats.score}",
+                f"{stats.nodes} nodes  {stats.nps:.0f} n/s  {1000 * stats.elapsed:.0f} ms",
+                f"EBF {stats.branching_factor:.2f}  cutoffs {stats.cutoffs}"
+                f" ({stats.first_move_cutoffs} first)  evals {stats.evaluations}",
+                f"TT {stats.tt_hits}/{stats.tt_probes}  TB {stats.tb_hits}  q {stats.qnodes}",
+            ]
+            for it in stats.iterations[-4:]:
+                lines.append(f"d{it['depth']}: {it['nodes']} nodes  {1000 * it['time']:.0f} ms  {it['score']}")
+            if stats.pv:
+                pv = " ".join(
+                    "{}{}-{}{}".format(*bitboard.move_to_tuple(move)[:4]) for move in stats.pv[:8]
+                )
+                lines.append(f"PV {pv}")
+
+        font = get_font("Consolas", 14)
+        height = 18 * len(lines) + 8
+        x, y = SCREEN_WIDTH - 370, 55  # below the home button
+        self.screen.blit(get_overlay((360, height), (0, 0, 0, 170)), (x, y))
+        for i, line in enumerate(lines):
+            self.screen.blit(text_cache.render(font, line, WHITE), (x + 6, y + 4 + 18 * i))
     
     def load_game_state(self):
         if not os.path.exists(self.SAVE_FILE):
@@ -1131,6 +1289,7 @@ class BaghChalPygame:
             with open(self.SAVE_FILE, "r") as f:
                 data = json.load(f)
             
+            self.game.reset()
             self.board = data["board"]
             self.current_player = data["current_player"]
             self.selected = tuple(data["selected"]) if data["selected"] else None
@@ -1143,6 +1302,12 @@ class BaghChalPygame:
             self.ai_player = data["ai_player"]
             
             self.game_mode = "playing"
+
+            # Resume an AI turn that was cancelled by going home
+            if self.mode == "Play with AI" and self.current_player == self.ai_player:
+                pygame.time.set_timer(pygame.USEREVENT, 500)
+            else:
+                self.start_pondering()
             return True
             
         except Exception as e:
@@ -1224,30 +1389,32 @@ class BaghChalPygame:
             self.ai_difficulty = None
             self.ai_player = None
 
+        self.cancel_ai_search()
         self.init_board()
         self.selected = None
         self.legal_moves = []
         self.current_player = 'R'
         self.extra_turn_after_capture = False
-        self.ai_thinking = False
 
         self.game_mode = "playing"
         self.show_mode_selection = False
 
         if self.mode == "Play with AI" and self.current_player == self.ai_player:
             pygame.time.set_timer(pygame.USEREVENT, 500)
+        else:
+            self.start_pondering()
 
     
     def restart_current_game(self):
         """Restart game using the SAME mode & AI settings"""
 
         # Reset board only
+        self.cancel_ai_search()
         self.init_board()
         self.selected = None
         self.legal_moves = []
         self.current_player = 'R'
         self.extra_turn_after_capture = False
-        self.ai_thinking = False
 
         # Keep SAME mode
         if self.mode == "Play with AI":
@@ -1262,25 +1429,33 @@ class BaghChalPygame:
         # AI starts if needed
         if self.mode == "Play with AI" and self.current_player == self.ai_player:
             pygame.time.set_timer(pygame.USEREVENT, 500)
+        else:
+            self.start_pondering()
 
 
     def home_game(self):
+        self.cancel_ai_search()
         self.selected = None
         self.legal_moves = []
         self.current_player = 'R'
         self.extra_turn_after_capture = False
-        self.ai_thinking = False
         self.init_board()
     
     def run(self):
-        clock = pygame.time.Clock()
+        pacer = FramePacer()
         running = True
         
         while running:
+            # Frame-paced while something animates, otherwise asleep until
+            # the next input, timer or AI event
+            events = pacer.next_events(self.animations())
             mouse_pos = pygame.mouse.get_pos()
             
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
+            for event in events:
+                if event.type == pygame.VIDEOEXPOSE:
+                    self.dirty_tracker.invalidate()
+                elif event.type == pygame.QUIT:
+                    self.cancel_ai_search()
                     if self.game_mode == "playing":
                         self.save_game_state()   # ✅ only save real games
                     self.save_window_geometry()
@@ -1288,6 +1463,11 @@ class BaghChalPygame:
                 elif event.type == pygame.USEREVENT:
                     pygame.time.set_timer(pygame.USEREVENT, 0)  # Clear timer
                     self.ai_move()
+                elif event.type == AI_RESULT_EVENT:
+                    if event.generation == self.ai_generation:
+                        self.apply_ai_move(event.move, event.stats)
+                elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                    self.show_search_stats = not self.show_search_stats
                 
                 # In the event handling section
                 elif event.type == pygame.MOUSEBUTTONDOWN:
@@ -1313,13 +1493,15 @@ class BaghChalPygame:
                             self.show_mode_selection = True
 
                     elif self.game_mode == "splash" and self.show_mode_selection:
-                        self.dropdowns["mode"].handle_event(event)
+                        picked = self.dropdowns["mode"].handle_event(event)
 
                         if self.dropdowns["mode"].get_selected() == "Play with AI":
-                            self.dropdowns["ai_color"].handle_event(event)
-                            self.dropdowns["difficulty"].handle_event(event)
+                            picked = self.dropdowns["ai_color"].handle_event(event) or picked
+                            picked = self.dropdowns["difficulty"].handle_event(event) or picked
 
-                        if self.buttons["start"].is_clicked(mouse_pos, event):
+                        if picked:
+                            pass
+                        elif self.buttons["start"].is_clicked(mouse_pos, event):
                             self.start_game()
 
                         elif self.buttons["back"].is_clicked(mouse_pos, event):
@@ -1357,18 +1539,18 @@ class BaghChalPygame:
                                     self.selected = (r, c)
                                     self.legal_moves = self.find_legal_moves(r, c)
 
-            self.selection_ring.update()          
-            # Draw current screen
-            if self.game_mode == "splash":
-                self.draw_splash_screen()
-            elif self.game_mode == "mode_select":
-                self.draw_game_mode_screen()
-            elif self.game_mode == "playing":
-                self.draw_game_screen()
-            
-            pygame.display.flip()
-            clock.tick(60)
-        
+            if pacer.frame_due:
+                self.selection_ring.update()          
+            # Redraw and present only the parts of the screen that changed
+            screen_state, regions = self.screen_regions(mouse_pos)
+            dirty = self.dirty_tracker.update(self.screen.get_rect(), screen_state, regions)
+            if dirty:
+                self.screen.set_clip(dirty[0].unionall(dirty[1:]))
+                self.draw_frame()
+                self.screen.set_clip(None)
+                pygame.display.update(dirty)
+        
+        self.game.close()
         pygame.quit()
         sys.exit()
 
@@ -0,0 +1,324 @@
+"""Monte Carlo Tree Search (UCT) player.
+
+Unlike ``search.Searcher`` this needs no evaluation function: every leaf is
+scored by playing the game out with a fast random policy (captures first,
+as the Easy AI plays) over the bitboard masks, and the tree grows towards
+the moves that win those playouts most often.
+
+Leaves are selected in batches.  Each selection adds a virtual loss along
+its path, so one batch spreads over different lines, and the batch's
+playouts are then run together: in-process, or split across a pool of
+worker processes.  The tree is kept between moves; the next search starts
+from the node for the new position if it is still in the tree.
+
+Run as a script to report playout rates::
+
+    python mcts.py --workers 1 2 4 --time 2
+"""
+
+import argparse
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import bitboard
+
+# UCT exploration constant
+EXPLORATION = 1.4
+# Leaves selected per batch, per worker process
+BATCH_SIZE = 16
+# A playout still running after this many plies goes to the side with more
+# pieces, or is a draw
+ROLLOUT_MAX_PLIES = 100
+# How many plies below the old root a new search looks for its position
+REUSE_DEPTH = 4
+
+
+def opponent(side):
+    return 'G' if side == 'R' else 'R'
+
+
+def winner(red, green, side):
+    """The winner if the game is over with ``side`` to move, else None."""
+    own, other = (red, green) if side == 'R' else (green, red)
+    if not other:
+        return side
+    if not own or not bitboard.has_moves(own, other):
+        return opponent(side)
+    return None
+
+
+def play(red, green, side, move):
+    """``(red, green, side)`` after ``side`` plays ``move``."""
+    if side == 'R':
+        red, green = bitboard.apply_move(red, green, move)
+        own, other = red, green
+    else:
+        green, red = bitboard.apply_move(green, red, move)
+        own, other = green, red
+    if move[2] < 0 or not bitboard.has_moves(own, other):
+        side = opponent(side)
+    return red, green, side
+
+
+def rollout(red, green, side, rng, max_plies=ROLLOUT_MAX_PLIES):
+    """Play the game out at random and return the winner ('R', 'G' or None)."""
+    generate_moves = bitboard.generate_moves
+    apply_move = bitboard.apply_move
+    has_moves = bitboard.has_moves
+    choice = rng.choice
+    for _ in range(max_plies):
+        if side == 'R':
+            own, other = red, green
+        else:
+            own, other = green, red
+        if not other:
+            return side
+        moves = generate_moves(own, other)
+        if not moves:
+            return opponent(side)
+        captures = [m for m in moves if m[2] >= 0]
+        move = choice(captures or moves)
+        own, other = apply_move(own, other, move)
+        if side == 'R':
+            red, green = own, other
+        else:
+            green, red = own, other
+        if move[2] < 0 or not has_moves(own, other):
+            side = opponent(side)
+
+    red_count = bitboard.popcount(red)
+    green_count = bitboard.popcount(green)
+    if red_count == green_count:
+        return None
+    return 'R' if red_count > green_count else 'G'
+
+
+def _rollout_batch(leaves, seed):
+    rng = random.Random(seed)
+    return [rollout(red, green, side, rng) for red, green, side in leaves]
+
+
+class Node:
+    """One position in the tree.
+
+    ``wins`` counts playouts through this node won by the side that moved
+    into it (``parent.side``), draws counting half.
+    """
+
+    __slots__ = ("move", "parent", "red", "green", "side", "winner",
+                 "children", "untried", "visits", "wins")
+
+    def __init__(self, red, green, side, move=None, parent=None):
+        self.move = move
+        self.parent = parent
+        self.red = red
+        self.green = green
+        self.side = side
+        self.winner = winner(red, green, side)
+        self.children = []
+        self.untried = []
+        if self.winner is None:
+            own, other = (red, green) if side == 'R' else (green, red)
+            self.untried = bitboard.generate_moves(own, other)
+        self.visits = 0
+        self.wins = 0.0
+
+    def expand(self, rng):
+        move = self.untried.pop(rng.randrange(len(self.untried)))
+        child = Node(*play(self.red, self.green, self.side, move), move=move, parent=self)
+        self.children.append(child)
+        return child
+
+    def select_child(self, exploration):
+        log_visits = math.log(self.visits)
+        return max(
+            self.children,
+            key=lambda child: child.wins / child.visits
+            + exploration * math.sqrt(log_visits / child.visits)
+        )
+
+    def most_visited(self):
+        return max(self.children, key=lambda child: child.visits)
+
+
+class MCTS:
+    """UCT search with batched playouts and tree reuse between moves.
+
+    ``playouts`` counts every playout run, like ``search.Searcher.nodes``.
+    With ``workers`` > 1 the playouts of each batch are spread over a
+    process pool that is started on the first search and lives until
+    ``close``.
+    """
+
+    def __init__(self, workers=1, exploration=EXPLORATION, seed=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.exploration = exploration
+        self.rng = random.Random(seed)
+        self.playouts = 0
+        self.root = None
+        self._stop = False
+        self._pool = None
+
+    def stop(self):
+        """Make the running search return its best move after this batch."""
+        self._stop = True
+
+    def clear_stop(self):
+        self._stop = False
+
+    @property
+    def stopped(self):
+        return self._stop
+
+    def reset(self):
+        """Forget the tree."""
+        self.root = None
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _find_root(self, position):
+        target = (position.red, position.green, position.side)
+        level = [self.root] if self.root is not None else []
+        for _ in range(REUSE_DEPTH + 1):
+            for node in level:
+                if (node.red, node.green, node.side) == target:
+                    node.parent = None
+                    node.move = None
+                    return node
+            level = [child for node in level for child in node.children]
+        return Node(*target)
+
+    def _select(self, root):
+        # Every node on the path gets its visit now, before the playout
+        # result is known: a virtual loss until backpropagation.
+        node = root
+        node.visits += 1
+        while node.winner is None:
+            if node.untried:
+                node = node.expand(self.rng)
+            else:
+                node = node.select_child(self.exploration)
+            node.visits += 1
+            if node.visits == 1:
+                break
+        return node
+
+    def _backpropagate(self, node, result):
+        while node.parent is not None:
+            if result is None:
+                node.wins += 0.5
+            elif result == node.parent.side:
+                node.wins += 1
+            node = node.parent
+
+    def _rollouts(self, leaves):
+        if self.workers <= 1:
+            return [rollout(red, green, side, self.rng) for red, green, side in leaves]
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        size = -(-len(leaves) // self.workers)
+        futures = [
+            self._pool.submit(_rollout_batch, leaves[i:i + size], self.rng.getrandbits(64))
+            for i in range(0, len(leaves), size)
+        ]
+        results = []
+        for future in futures:
+            results.extend(future.result())
+        return results
+
+    def principal_variation(self, max_length=32):
+        line = []
+        node = self.root
+        while node is not None and node.children and len(line) < max_length:
+            node = node.most_visited()
+            line.append(node.move)
+        return line
+
+    def search(self, position, playouts=None, time_limit=None, stats=None):
+        """Search ``position`` and return ``(best_move, win_rate)``.
+
+        Runs until ``playouts`` playouts or ``time_limit`` seconds, whichever
+        comes first (at least one batch), or until ``stop`` is called.
+        ``win_rate`` is the share of the best move's playouts won by the
+        side to move.  ``stats`` (a ``search.SearchStats``) gets the playout
+        count as nodes, the win rate in percent as score and the most
+        visited line as principal variation.
+        """
+        start = time.perf_counter()
+        start_playouts = self.playouts
+        deadline = None if time_limit is None else start + time_limit
+        root = self.root = self._find_root(position)
+        if root.winner is not None:
+            return None, 0.0
+
+        done = 0
+        while True:
+            batch = BATCH_SIZE * self.workers
+            if playouts is not None:
+                batch = min(batch, playouts - done)
+            leaves = [self._select(root) for _ in range(batch)]
+            pending = [node for node in leaves if node.winner is None]
+            results = iter(self._rollouts([(n.red, n.green, n.side) for n in pending]))
+            for node in leaves:
+                result = node.winner if node.winner is not None else next(results)
+                self._backpropagate(node, result)
+            done += batch
+            self.playouts += batch
+
+            if self._stop:
+                break
+            if playouts is not None and done >= playouts:
+                break
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+            if playouts is None and deadline is None:
+                break
+
+        best = root.most_visited()
+        win_rate = best.wins / best.visits
+        if stats is not None:
+            stats.source = "mcts"
+            stats.move = best.move
+            stats.score = round(100 * win_rate)
+            stats.pv = self.principal_variation()
+            stats.depth = len(stats.pv)
+            stats.nodes = self.playouts - start_playouts
+            stats.elapsed = time.perf_counter() - start
+        return best.move, win_rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report MCTS playout rates.")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--time", type=float, default=2.0, help="seconds per search")
+    args = parser.parse_args()
+
+    position = bitboard.Position()
+    for workers in args.workers:
+        with MCTS(workers, seed=0) as player:
+            if workers > 1:
+                player.search(position, playouts=BATCH_SIZE * workers)  # start the pool
+                player.reset()
+            start_playouts = player.playouts
+            start = time.perf_counter()
+            move, win_rate = player.search(position, time_limit=args.time)
+            elapsed = time.perf_counter() - start
+        rate = (player.playouts - start_playouts) / elapsed
+        print(f"{workers:2d} workers  {rate:9.0f} playouts/s  "
+              f"best {bitboard.move_to_tuple(move)[:4]}  win rate {win_rate:.2f}")
+
+
+if __name__ == "__main__":
+    main()
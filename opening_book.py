@@ -0,0 +1,164 @@
+"""Opening book: precomputed best moves for the first plies of a game.
+
+The book is a flat binary file: an 8-byte header (``BOOK_MAGIC`` and the
+record count) followed by fixed-size records sorted by Zobrist key::
+
+    key (uint64)  src (uint8)  dst (uint8)  score (int16)
+
+Each record holds the best move and its score for the side to move, found
+by a deep offline search.  Build it with::
+
+    python opening_book.py --plies 6 --depth 10 --width 3 -o opening_book.bin
+
+The builder walks the tree from the initial position for each colour in
+turn: where that colour is to move it follows only the book move, where the
+opponent is to move it follows the ``width`` most promising replies.
+"""
+
+import argparse
+import struct
+import time
+
+import bitboard
+import search
+
+BOOK_FILE = "opening_book.bin"
+BOOK_MAGIC = b"BBOK"
+_HEADER = struct.Struct("<4sI")
+_RECORD = struct.Struct("<QBBh")
+
+
+def _move_from_points(src, dst):
+    r1, c1 = bitboard.point_coords(src)
+    r2, c2 = bitboard.point_coords(dst)
+    if max(abs(r2 - r1), abs(c2 - c1)) == 2:
+        return (src, dst, (src + dst) // 2)
+    return (src, dst, -1)
+
+
+class OpeningBook:
+    def __init__(self, entries=None):
+        # Zobrist key -> (move, score for the side to move)
+        self.entries = entries or {}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, position):
+        return position.key in self.entries
+
+    @classmethod
+    def load(cls, path):
+        """Read a book file; a missing or malformed file gives an empty book."""
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return cls()
+
+        if len(data) < _HEADER.size:
+            return cls()
+        magic, count = _HEADER.unpack_from(data)
+        if magic != BOOK_MAGIC or len(data) != _HEADER.size + count * _RECORD.size:
+            print("Ignoring invalid opening book:", path)
+            return cls()
+
+        entries = {}
+        for key, src, dst, score in _RECORD.iter_unpack(data[_HEADER.size:]):
+            entries[key] = (_move_from_points(src, dst), score)
+        return cls(entries)
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(_HEADER.pack(BOOK_MAGIC, len(self.entries)))
+            for key in sorted(self.entries):
+                move, score = self.entries[key]
+                score = max(-32768, min(32767, score))
+                f.write(_RECORD.pack(key, move[0], move[1], score))
+
+    def add(self, position, move, score):
+        self.entries[position.key] = (move, score)
+
+    def probe(self, position):
+        """Return ``(move, score)`` for the side to move, or None."""
+        entry = self.entries.get(position.key)
+        if entry is None or entry[0] not in position.legal_moves():
+            return None
+        return entry
+
+
+def rank_moves(searcher, position, depth):
+    """All legal moves sorted by a full-window search score, best first."""
+    searcher.set_player(position.side)
+    side = position.side
+    ranked = []
+    for move in position.legal_moves():
+        position.make_move(move)
+        if position.side == side:
+            score = searcher.negamax(position, depth - 1, -search.INFINITY, search.INFINITY, 1)
+        else:
+            score = -searcher.negamax(position, depth - 1, -search.INFINITY, search.INFINITY, 1)
+        position.unmake_move(move)
+        ranked.append((score, move))
+    ranked.sort(key=lambda item: item[0], reverse=True)
+    return [move for _, move in ranked]
+
+
+def build(plies=6, depth=10, width=3, time_limit=None, rank_depth=4, log=print):
+    """Search the opening tree and return the resulting ``OpeningBook``."""
+    book = OpeningBook()
+    searcher = search.Searcher()
+    ranker = search.Searcher()
+    started = time.perf_counter()
+
+    for book_side in ('R', 'G'):
+        frontier = [bitboard.Position()]
+        for ply in range(plies):
+            next_frontier = []
+            seen = set()
+            for position in frontier:
+                if position.key in seen:
+                    continue
+                seen.add(position.key)
+                if not position.legal_moves():
+                    continue
+                if position.side == book_side:
+                    if position not in book:
+                        move, score, completed = searcher.iterative_deepening(
+                            position, depth, time_limit=time_limit, max_player=book_side
+                        )
+                        book.add(position, move, score)
+                        log(f"{len(book):4d} entries  ply {ply}  depth {completed}  "
+                            f"{time.perf_counter() - started:7.1f}s")
+                    replies = [book.entries[position.key][0]]
+                else:
+                    replies = rank_moves(ranker, position, rank_depth)[:width]
+
+                for move in replies:
+                    child = position.copy()
+                    child.make_move(move)
+                    next_frontier.append(child)
+            frontier = next_frontier
+    return book
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the Bagh Bandi opening book.")
+    parser.add_argument("--plies", type=int, default=6,
+                        help="depth of the opening tree covered by the book")
+    parser.add_argument("--depth", type=int, default=10,
+                        help="search depth for every book position")
+    parser.add_argument("--width", type=int, default=3,
+                        help="opponent replies followed at each ply")
+    parser.add_argument("--time", type=float, default=None,
+                        help="optional time limit per book position in seconds")
+    parser.add_argument("-o", "--output", default=BOOK_FILE)
+    args = parser.parse_args()
+
+    book = build(args.plies, args.depth, args.width, args.time)
+    book.save(args.output)
+    print(f"Wrote {len(book)} positions to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+"""Root-splitting parallel search over a pool of worker processes.
+
+The first root move is searched on its own to establish a bound, then the
+remaining moves are scored in parallel against that bound, one task per
+move.  Moves are compared in the serial order with the serial tie-break,
+so the best move is the one ``search.Searcher`` picks at the same depth.
+
+Each worker process keeps its own ``search.Searcher`` (and transposition
+table) for as long as the pool lives; the pool is started and warmed up
+once and reused for every move of a game.  A stop event shared with the
+workers lets ``stop`` end the searches already running in them; it is
+also set when a search runs out of time, so no task outlives its search.
+
+Run as a script to report the speedup over the serial search, and the
+extra nodes the split costs, for each worker count::
+
+    python parallel.py --workers 1 2 4 8 --depth 6 -o speedup.json
+
+Speedups are only meaningful for worker counts up to the number of CPUs:
+with more workers than CPUs they measure time slicing, not the split (the
+script flags those rows).  The node overhead is the same on any machine.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+
+import bitboard
+import search
+import tablebase
+
+_searcher = None
+
+
+def _init_worker(tt_entries, tablebase_path, stop_event):
+    global _searcher
+    _searcher = search.Searcher(tt_entries)
+    _searcher.stop_event = stop_event
+    if tablebase_path:
+        try:
+            _searcher.tablebase = tablebase.Tablebase.open(tablebase_path)
+        except Exception as e:
+            print("Tablebase load failed:", e)
+
+
+def _warm_up(_):
+    # Long enough that every worker picks up one of the warm-up tasks.
+    time.sleep(0.05)
+    return os.getpid()
+
+
+def _search_move(red, green, side, max_player, move, depth, alpha, deadline):
+    """Score one root move against ``alpha`` in a worker process.
+
+    ``deadline`` is a ``time.monotonic()`` time (the same clock in every
+    process), so a task that waited in the queue gets only what is left of
+    the move's budget.  Returns ``(score, nodes)``.  A score <= ``alpha`` is
+    an upper bound, a higher one is exact; ``score`` is None if the deadline
+    passed or the search was stopped.
+    """
+    time_limit = None
+    if deadline is not None:
+        time_limit = deadline - time.monotonic()
+        if time_limit <= 0:
+            return None, 0
+    searcher = _searcher
+    searcher.set_player(max_player)
+    searcher.clear_stop()
+    start_nodes = searcher.nodes
+    position = bitboard.Position(red, green, side)
+    searcher.set_limits(time_limit)
+    try:
+        position.make_move(move)
+        if position.side == side:
+            score = searcher.negamax(position, depth - 1, alpha, search.INFINITY, 1)
+        else:
+            score = -searcher.negamax(position, depth - 1, -search.INFINITY, -alpha, 1)
+    except search.SearchTimeout:
+        score = None
+    finally:
+        searcher.clear_limits()
+    return score, searcher.nodes - start_nodes
+
+
+class ParallelSearcher:
+    """Process-pool counterpart of ``search.Searcher`` for root searches."""
+
+    def __init__(self, workers=None, tt_entries=search.DEFAULT_TT_ENTRIES,
+                 tablebase_path=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.nodes = 0
+        self.max_player = 'R'
+        self._stop = False
+        self._stop_event = multiprocessing.Event()
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(tt_entries, tablebase_path, self._stop_event)
+        )
+        # Start every worker now so the first search does not pay for it.
+        list(self._pool.map(_warm_up, range(self.workers)))
+
+    def set_player(self, max_player):
+        self.max_player = max_player
+
+    def stop(self):
+        """Abandon the running search; busy workers give up at their next limit check."""
+        self._stop = True
+        self._stop_event.set()
+
+    def clear_stop(self):
+        self._stop = False
+        self._stop_event.clear()
+
+    @property
+    def stopped(self):
+        return self._stop
+
+    def close(self):
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _search_moves(self, position, moves, depth, scores=None, time_limit=None):
+        deadline = None if time_limit is None else time.monotonic() + time_limit
+        args = (position.red, position.green, position.side, self.max_player)
+
+        score, nodes = self._pool.submit(
+            _search_move, *args, moves[0], depth, -search.INFINITY, deadline
+        ).result()
+        self.nodes += nodes
+        if score is None or self._stop:
+            raise search.SearchTimeout()
+        results = [score]
+
+        alpha = score
+        futures = [
+            self._pool.submit(_search_move, *args, move, depth, alpha, deadline)
+            for move in moves[1:]
+        ]
+        try:
+            for future in futures:
+                score, nodes = future.result()
+                self.nodes += nodes
+                if score is None or self._stop:
+                    raise search.SearchTimeout()
+                results.append(score)
+        except search.SearchTimeout:
+            # Stop the tasks still running as well and wait for them, so
+            # they do not hold the pool into the next search.
+            for future in futures:
+                future.cancel()
+            self._stop_event.set()
+            wait(futures)
+            if not self._stop:
+                self._stop_event.clear()
+            raise
+        finally:
+            for future in futures:
+                future.cancel()
+
+        best_move = None
+        best_score = -search.INFINITY
+        for move, score in zip(moves, results):
+            if scores is not None:
+                scores[move] = score
+            if score > best_score:
+                best_score = score
+                best_move = move
+        return best_move, best_score
+
+    def search_root(self, position, depth, max_player=None):
+        """Parallel ``search.Searcher.search_root``."""
+        if max_player is not None:
+            self.set_player(max_player)
+        moves = position.legal_moves()
+        if not moves:
+            return None, -search.INFINITY
+        return self._search_moves(position, moves, depth)
+
+    def iterative_deepening(self, position, max_depth, time_limit=None,
+                            node_limit=None, max_player=None, stats=None):
+        """Parallel ``search.Searcher.iterative_deepening``.
+
+        ``node_limit`` is checked between iterations only.  ``stats`` gets
+        nodes and times per iteration; the other counters stay in the
+        worker processes and are left at zero.
+        """
+        if max_player is not None:
+            self.set_player(max_player)
+        moves = position.legal_moves()
+        if not moves:
+            return None, -search.NO_MOVES_SCORE, 0
+
+        start = time.perf_counter()
+        start_nodes = self.nodes
+        scores = {}
+        best_move = moves[0]
+        best_score = -search.INFINITY
+        completed = 0
+        for depth in range(1, max_depth + 1):
+            budget = None
+            if completed and time_limit is not None:
+                budget = start + time_limit - time.perf_counter()
+            iteration_start = time.perf_counter()
+            iteration_nodes = self.nodes
+            try:
+                move, score = self._search_moves(position, moves, depth, scores, budget)
+            except search.SearchTimeout:
+                break
+            best_move, best_score, completed = move, score, depth
+            moves.sort(key=scores.__getitem__, reverse=True)
+            if stats is not None:
+                stats.iterations.append({
+                    "depth": depth, "nodes": self.nodes - iteration_nodes,
+                    "time": time.perf_counter() - iteration_start, "score": score,
+                    "move": move, "pv": [move],
+                })
+
+            if abs(best_score) >= search.MATE_SCORE - max_depth:
+                break
+            if time_limit is not None and time.perf_counter() - start > time_limit / 2:
+                break
+            if node_limit is not None and self.nodes - start_nodes >= node_limit:
+                break
+        if stats is not None:
+            stats.nodes = self.nodes - start_nodes
+            stats.elapsed = time.perf_counter() - start
+            stats.move, stats.score, stats.depth = best_move, best_score, completed
+            stats.pv = [best_move]
+        return best_move, best_score, completed
+
+
+def _benchmark_positions():
+    positions = [bitboard.Position()]
+    # A fixed mid-game line reached by quick serial play from the start.
+    searcher = search.Searcher()
+    position = bitboard.Position()
+    for _ in range(6):
+        move, _, _ = searcher.iterative_deepening(position, 3, max_player=position.side)
+        position.make_move(move)
+        positions.append(position.copy())
+    return positions[::2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report parallel root search speedup.")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--depth", type=int, default=6)
+    parser.add_argument("-o", "--output", help="write the measurements to this JSON file")
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} CPUs")
+    positions = _benchmark_positions()
+
+    serial = search.Searcher()
+    start = time.perf_counter()
+    expected = []
+    for position in positions:
+        serial.tt.clear()
+        expected.append(serial.search_root(position, args.depth, position.side)[0])
+    serial_time = time.perf_counter() - start
+    print(f"serial      {serial_time:8.2f}s  {serial.nodes / serial_time:9.0f} nodes/s")
+    report = {
+        "cpus": os.cpu_count(), "depth": args.depth,
+        "serial": {"seconds": serial_time, "nodes": serial.nodes}, "parallel": [],
+    }
+
+    for workers in args.workers:
+        with ParallelSearcher(workers) as parallel:
+            start = time.perf_counter()
+            moves = [parallel.search_root(position, args.depth, position.side)[0]
+                     for position in positions]
+            elapsed = time.perf_counter() - start
+        same = sum(a == b for a, b in zip(moves, expected))
+        meaningful = workers <= (os.cpu_count() or 1)
+        print(f"{workers:2d} workers  {elapsed:8.2f}s  {parallel.nodes / elapsed:9.0f} nodes/s"
+              f"  speedup {serial_time / elapsed:5.2f}x  nodes {parallel.nodes / serial.nodes:4.2f}x"
+              f"  same move {same}/{len(positions)}"
+              + ("" if meaningful else "  (more workers than CPUs: speedup not meaningful)"))
+        report["parallel"].append({
+            "workers": workers, "seconds": elapsed, "nodes": parallel.nodes,
+            "speedup": serial_time / elapsed, "speedup_meaningful": meaningful,
+            "same_move": same,
+        })
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
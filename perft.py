@@ -0,0 +1,184 @@
+"""Perft: count the leaf nodes of the move tree to verify move generation.
+
+The game has three move generators that must agree:
+
+``bitboard``  ``bitboard.Position.legal_moves`` (what the AI searches)
+``engine``    ``engine.Game.find_all_moves_for_player``
+``legal``     ``engine.Game.find_legal_moves`` per piece (what the UI offers)
+
+A ply is one move, so the moves of an extra turn after a capture count as
+plies of their own.  A finished game has no moves: positions where a side
+has lost every piece or cannot move contribute no leaves below them.
+
+    python perft.py --depth 4                       # initial position
+    python perft.py --depth 3 --divide --board "RRRRR/R.R.R/R.G.R/G...G/GGGGG"
+    python perft.py --suite                         # check every generator
+
+``--suite`` runs the reference positions below with every generator and
+exits with status 1 if any count differs from the expected one.
+"""
+
+import argparse
+import sys
+import time
+
+import bitboard
+import engine
+
+GENERATORS = ("bitboard", "engine", "legal")
+
+INITIAL_BOARD = "RRRRR/RRRRR/...../GGGGG/GGGGG"
+
+# (name, board, side to move, depth, expected leaf count)
+REFERENCE = [
+    ("initial", INITIAL_BOARD, 'R', 5, 106053),
+    ("initial green", INITIAL_BOARD, 'G', 5, 106053),
+    # Pieces on odd points, which have no diagonal moves.
+    ("odd points", "R.R.R/.R.R./...../.G.G./G.G.G", 'R', 4, 104842),
+    # Captures available to both sides.
+    ("captures", "RRRRR/R.R.R/R.G.R/G...G/GGGGG", 'R', 5, 817848),
+    # A capture that leaves another capture: an extra-turn chain.
+    ("extra-turn chain", "R..../.G.../...../...G./....G", 'R', 6, 71994),
+    ("double chain", "....R/...G./.G.G./...../G....", 'R', 6, 103380),
+    # Few pieces: trapped sides and finished games inside the tree.
+    ("endgame", "R...R/...../..G../...../.....", 'G', 6, 78058),
+    ("trapped", "RG.../GG.../...../...../.....", 'R', 6, 19810),
+]
+
+
+def parse_board(text):
+    return [[None if ch == '.' else ch for ch in row] for row in text.split("/")]
+
+
+def move_name(move):
+    """``"11-20"``: source row and column, then destination row and column."""
+    return "{}{}-{}{}".format(*move[:4])
+
+
+def _bitboard_perft(position, depth):
+    if depth == 0:
+        return 1
+    if not position.red or not position.green:
+        return 0
+    moves = position.legal_moves()
+    if depth == 1:
+        return len(moves)
+    total = 0
+    for move in moves:
+        position.make_move(move)
+        total += _bitboard_perft(position, depth - 1)
+        position.unmake_move(move)
+    return total
+
+
+def _game_moves(game, generator):
+    if game.winner:
+        return []
+    if generator == "engine":
+        return game.find_all_moves_for_player(game.current_player)
+    moves = []
+    for r in range(engine.GRID_SIZE):
+        for c in range(engine.GRID_SIZE):
+            if game.board[r][c] == game.current_player:
+                for dr, dc in game.find_legal_moves(r, c):
+                    kind = 'capture' if max(abs(dr - r), abs(dc - c)) == 2 else 'move'
+                    moves.append((r, c, dr, dc, kind))
+    return moves
+
+
+def _game_perft(game, depth, generator):
+    if depth == 0:
+        return 1
+    moves = _game_moves(game, generator)
+    if depth == 1:
+        return len(moves)
+    total = 0
+    for move in moves:
+        child = game.copy()
+        child.apply_move(move)
+        total += _game_perft(child, depth - 1, generator)
+    return total
+
+
+def _new_game(board, side):
+    game = engine.Game([row[:] for row in board], side)
+    game.update_winner()
+    return game
+
+
+def divide(board, side, depth, generator="bitboard"):
+    """Leaf counts below each root move, as ``{move tuple: count}``."""
+    counts = {}
+    if generator == "bitboard":
+        position = bitboard.Position.from_board(board, side)
+        if not position.red or not position.green:
+            return counts
+        for move in position.legal_moves():
+            position.make_move(move)
+            counts[bitboard.move_to_tuple(move)] = _bitboard_perft(position, depth - 1)
+            position.unmake_move(move)
+    else:
+        game = _new_game(board, side)
+        for move in _game_moves(game, generator):
+            child = game.copy()
+            child.apply_move(move)
+            counts[move] = _game_perft(child, depth - 1, generator)
+    return counts
+
+
+def perft(board, side, depth, generator="bitboard"):
+    if generator == "bitboard":
+        return _bitboard_perft(bitboard.Position.from_board(board, side), depth)
+    return _game_perft(_new_game(board, side), depth, generator)
+
+
+def run_suite(generators=GENERATORS):
+    failures = 0
+    for name, text, side, depth, expected in REFERENCE:
+        board = parse_board(text)
+        for generator in generators:
+            start = time.perf_counter()
+            count = perft(board, side, depth, generator)
+            elapsed = time.perf_counter() - start
+            status = "ok" if count == expected else f"FAIL (expected {expected})"
+            if count != expected:
+                failures += 1
+            print(f"{name:<18} {generator:<9} depth {depth}  {count:>9}  "
+                  f"{elapsed:7.2f}s  {status}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Count move-tree leaves to verify move generation.")
+    parser.add_argument("--depth", type=int, default=4)
+    parser.add_argument("--board", default=INITIAL_BOARD,
+                        help="rows top to bottom separated by '/', '.' for empty")
+    parser.add_argument("--side", choices="RG", default='R')
+    parser.add_argument("--generator", choices=GENERATORS, default="bitboard")
+    parser.add_argument("--divide", action="store_true", help="show the count below each root move")
+    parser.add_argument("--suite", action="store_true", help="check the reference positions")
+    args = parser.parse_args()
+
+    if args.suite:
+        failures = run_suite()
+        if failures:
+            print(f"\n{failures} perft mismatch(es)")
+            sys.exit(1)
+        return
+
+    board = parse_board(args.board)
+    start = time.perf_counter()
+    if args.divide:
+        counts = divide(board, args.side, args.depth, args.generator)
+        for move in sorted(counts):
+            print(f"{move_name(move)}: {counts[move]}")
+        total = sum(counts.values())
+    else:
+        total = perft(board, args.side, args.depth, args.generator)
+    elapsed = time.perf_counter() - start
+    nps = total / elapsed if elapsed else 0
+    print(f"\nNodes: {total}  Time: {elapsed:.3f}s  NPS: {nps:.0f}")
+
+
+if __name__ == "__main__":
+    main()
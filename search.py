@@ -0,0 +1,592 @@
+"""Alpha-beta search over ``bitboard.Position`` with a transposition table.
+
+Scores follow the conventions of the original ``BaghChalPygame.minimax``:
+a side that has lost every piece scores ``-MATE_SCORE`` adjusted by the
+remaining depth, a side with no legal move scores ``-NO_MOVES_SCORE`` and
+leaves are scored with ``bitboard.evaluate`` from the searching player's
+point of view.  ``Searcher.negamax`` returns scores relative to the side to
+move.
+
+With a ``tablebase.Tablebase`` attached, positions it covers are not
+searched: they score ``TABLEBASE_WIN_SCORE`` minus the plies to the end of
+the game, which ranks them above any static evaluation and below a mate
+found over the board.
+
+A capture keeps the turn with the capturing side (see ``bitboard.Position``),
+so a child is only negated when the side to move actually changed.  At the
+horizon a quiescence search keeps following capture chains until the
+position is quiet.
+"""
+
+import time
+
+import bitboard
+
+MATE_SCORE = 10000
+NO_MOVES_SCORE = 5000
+INFINITY = 1000000
+TABLEBASE_WIN_SCORE = MATE_SCORE - 500
+
+# Transposition table bound types.
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+DEFAULT_TT_ENTRIES = 1 << 18
+
+# Nodes searched between two checks of the time and node budgets.
+LIMIT_CHECK_INTERVAL = 1024
+
+MAX_PLY = 128
+
+# Nodes a single quiescence search may visit before it falls back to the
+# static evaluation.
+QUIESCENCE_NODE_CAP = 256
+
+# Move ordering keys; quiet moves without a killer slot sort by history.
+ORDER_TT_MOVE = 5000000
+ORDER_KILLER = (4000002, 4000001)
+ORDER_MULTI_CAPTURE = 3000001
+ORDER_CAPTURE = 3000000
+
+# Evaluation is not symmetric between the colours, so positions searched for
+# Red and for Green must not share table entries.
+_PERSPECTIVE_KEYS = {'R': 0, 'G': 0x5DEECE66DA3B0F17}
+
+
+class SearchTimeout(Exception):
+    """Raised inside the search when the time or node budget runs out."""
+
+
+class SearchStats:
+    """Where the time of one AI move went.
+
+    Filled in by ``Searcher.search_root`` and ``iterative_deepening`` (and
+    by the engine for moves that need no search).  ``iterations`` holds one
+    dict per completed depth with the nodes and seconds it took, its score,
+    best move and principal variation.  Counters cover the whole move,
+    including any interrupted last iteration.
+    """
+
+    def __init__(self, source="search"):
+        # "search", "ponder" (a search made while the opponent was thinking,
+        # with its own time and nodes), "book", "tablebase", "shortcut",
+        # "random" or "mcts" (whose nodes are playouts and score the win
+        # rate in percent)
+        self.source = source
+        self.move = None
+        self.score = None
+        self.depth = 0
+        self.pv = []
+        self.iterations = []
+        self.elapsed = 0.0
+        self.nodes = 0
+        self.qnodes = 0
+        self.evaluations = 0
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+        self.tt_probes = 0
+        self.tt_hits = 0
+        self.tb_hits = 0
+
+    @property
+    def nps(self):
+        return self.nodes / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def branching_factor(self):
+        """Effective branching factor: growth in nodes from one depth to the next."""
+        if len(self.iterations) < 2 or not self.iterations[-2]["nodes"]:
+            return 0.0
+        return self.iterations[-1]["nodes"] / self.iterations[-2]["nodes"]
+
+    def to_dict(self):
+        def moves(line):
+            return [list(bitboard.move_to_tuple(m)[:4]) for m in line]
+
+        return {
+            "source": self.source,
+            "move": moves([self.move])[0] if self.move else None,
+            "score": self.score,
+            "depth": self.depth,
+            "pv": moves(self.pv),
+            "elapsed": self.elapsed,
+            "nodes": self.nodes,
+            "nps": self.nps,
+            "qnodes": self.qnodes,
+            "evaluations": self.evaluations,
+            "cutoffs": self.cutoffs,
+            "first_move_cutoffs": self.first_move_cutoffs,
+            "branching_factor": self.branching_factor,
+            "tt_probes": self.tt_probes,
+            "tt_hits": self.tt_hits,
+            "tb_hits": self.tb_hits,
+            "iterations": [
+                dict(it, move=moves([it["move"]])[0], pv=moves(it["pv"]))
+                for it in self.iterations
+            ],
+        }
+
+
+class TranspositionTable:
+    """Fixed-size two-tier hash table keyed by Zobrist hash.
+
+    Each bucket has a depth-preferred slot, which keeps the deepest result
+    seen for that bucket, and an always-replace slot, which takes whatever
+    the depth-preferred slot refused or displaced.  The number of entries is
+    capped at ``max_entries`` regardless of how long the table is used.
+    """
+
+    def __init__(self, max_entries=DEFAULT_TT_ENTRIES):
+        buckets = 1
+        while buckets * 4 <= max_entries:
+            buckets *= 2
+        self.size = buckets
+        self.mask = buckets - 1
+        self.probes = 0
+        self.hits = 0
+        self.clear()
+
+    @property
+    def max_entries(self):
+        return self.size * 2
+
+    def clear(self):
+        self._deep = [None] * self.size
+        self._recent = [None] * self.size
+
+    def probe(self, key):
+        """Return ``(key, depth, score, bound, move)`` for ``key`` or None."""
+        self.probes += 1
+        index = key & self.mask
+        entry = self._deep[index]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry
+        entry = self._recent[index]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry
+        return None
+
+    def store(self, key, depth, score, bound, move):
+        index = key & self.mask
+        entry = (key, depth, score, bound, move)
+        deep = self._deep[index]
+        if deep is None or deep[0] == key or depth >= deep[1]:
+            self._deep[index] = entry
+            if deep is not None and deep[0] != key:
+                self._recent[index] = deep
+        else:
+            self._recent[index] = entry
+
+    def __len__(self):
+        return (sum(1 for e in self._deep if e is not None)
+                + sum(1 for e in self._recent if e is not None))
+
+
+class Searcher:
+    """Negamax alpha-beta search with a persistent transposition table.
+
+    One instance is meant to live for a whole game so the table carries
+    results over from one move to the next.
+    """
+
+    def __init__(self, tt_entries=DEFAULT_TT_ENTRIES):
+        self.tt = TranspositionTable(tt_entries)
+        self.nodes = 0
+        self.max_player = 'R'
+        self._perspective = 0
+        self._deadline = None
+        self._node_limit = None
+        self._next_check = float('inf')
+        self._stop = False
+        # Event shared with other processes that stops a search like
+        # ``stop`` while it is set (checked with the time and node limits)
+        self.stop_event = None
+        # killers[ply]: the last two quiet moves that caused a cutoff there.
+        self.killers = [[None, None] for _ in range(MAX_PLY)]
+        # history[side][src * NUM_POINTS + dst]: depth-weighted cutoff count.
+        self.history = {
+            'R': [0] * (bitboard.NUM_POINTS * bitboard.NUM_POINTS),
+            'G': [0] * (bitboard.NUM_POINTS * bitboard.NUM_POINTS),
+        }
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+        self.qnodes = 0
+        self._qnodes_left = 0
+        self.tablebase = None
+        self.tb_hits = 0
+        self.evaluations = 0
+
+    def set_player(self, max_player):
+        self.max_player = max_player
+        self._perspective = _PERSPECTIVE_KEYS[max_player]
+
+    def clear_heuristics(self):
+        for slot in self.killers:
+            slot[0] = slot[1] = None
+        for table in self.history.values():
+            table[:] = [value >> 1 for value in table]
+
+    @property
+    def cutoff_rate(self):
+        """Share of beta cutoffs produced by the first move searched."""
+        if not self.cutoffs:
+            return 0.0
+        return self.first_move_cutoffs / self.cutoffs
+
+    def order_moves(self, moves, own, other, side, tt_move=None, ply=0):
+        """Sort ``moves`` in place, most promising first.
+
+        The transposition-table move comes first, then the killer moves for
+        ``ply``, then captures (those that leave the capturing piece another
+        capture ahead of the rest) and the remaining quiet moves by history.
+        """
+        killers = self.killers[ply] if ply < MAX_PLY else (None, None)
+        history = self.history[side]
+        empty = bitboard.FULL_MASK ^ (own | other)
+        jumps = bitboard.JUMPS
+        n = bitboard.NUM_POINTS
+
+        def key(move):
+            if move == tt_move:
+                return ORDER_TT_MOVE
+            if move == killers[0]:
+                return ORDER_KILLER[0]
+            if move == killers[1]:
+                return ORDER_KILLER[1]
+            src, dst, mid = move
+            if mid >= 0:
+                after_other = other ^ (1 << mid)
+                after_empty = empty ^ (1 << src) ^ (1 << mid) ^ (1 << dst)
+                for next_mid, next_dst in jumps[dst]:
+                    if after_other >> next_mid & 1 and after_empty >> next_dst & 1:
+                        return ORDER_MULTI_CAPTURE
+                return ORDER_CAPTURE
+            return history[src * n + dst]
+
+        moves.sort(key=key, reverse=True)
+
+    def _record_cutoff(self, move, side, depth, ply, first):
+        self.cutoffs += 1
+        if first:
+            self.first_move_cutoffs += 1
+        if move[2] >= 0:
+            return
+        if ply < MAX_PLY:
+            killers = self.killers[ply]
+            if killers[0] != move:
+                killers[1] = killers[0]
+                killers[0] = move
+        self.history[side][move[0] * bitboard.NUM_POINTS + move[1]] += depth * depth
+
+    def evaluate(self, position):
+        self.evaluations += 1
+        score = position.evaluate(self.max_player)
+        return score if position.side == self.max_player else -score
+
+    def stop(self):
+        """Ask a search running on another thread to give up.
+
+        The search raises ``SearchTimeout`` at its next node, and so does
+        every later search until ``clear_stop`` is called.
+        """
+        self._stop = True
+        self._next_check = 0
+
+    def clear_stop(self):
+        self._stop = False
+        self._next_check = float('inf')
+
+    @property
+    def stopped(self):
+        return self._stop
+
+    def set_limits(self, time_limit=None, node_limit=None):
+        """Bound the searches that follow by seconds and/or nodes from now."""
+        self._deadline = None if time_limit is None else time.perf_counter() + time_limit
+        self._node_limit = None if node_limit is None else self.nodes + node_limit
+        if self._deadline is not None or self._node_limit is not None or self.stop_event is not None:
+            self._next_check = min(self._next_check, self.nodes + LIMIT_CHECK_INTERVAL)
+
+    def clear_limits(self):
+        self._deadline = None
+        self._node_limit = None
+        self._next_check = 0 if self._stop else float('inf')
+
+    def _check_limits(self):
+        self._next_check = self.nodes + LIMIT_CHECK_INTERVAL
+        if self._stop or (self.stop_event is not None and self.stop_event.is_set()):
+            raise SearchTimeout()
+        if self._node_limit is not None and self.nodes >= self._node_limit:
+            raise SearchTimeout()
+        if self._deadline is not None and time.perf_counter() >= self._deadline:
+            raise SearchTimeout()
+
+    def _probe_tablebase(self, position, ply):
+        # Score of a covered position relative to the side to move, or None.
+        tablebase = self.tablebase
+        if tablebase is None or not tablebase.covers(position.red, position.green):
+            return None
+        self.tb_hits += 1
+        result, distance = tablebase.probe(position.red, position.green, position.side)
+        return result * (TABLEBASE_WIN_SCORE - ply - distance)
+
+    def negamax(self, position, depth, alpha, beta, ply=0):
+        self.nodes += 1
+        if self.nodes >= self._next_check:
+            self._check_limits()
+
+        own, other = position.own_masks()
+        if not own:
+            return -MATE_SCORE + depth
+        if not other:
+            return MATE_SCORE - depth
+        if ply:
+            score = self._probe_tablebase(position, ply)
+            if score is not None:
+                return score
+
+        tt = self.tt
+        key = position.key ^ self._perspective
+        entry = tt.probe(key)
+        tt_move = None
+        if entry is not None:
+            tt_move = entry[4]
+        if entry is not None and entry[1] >= depth:
+            score = entry[2]
+            bound = entry[3]
+            if bound == EXACT:
+                return score
+            if bound == LOWER and score >= beta:
+                return score
+            if bound == UPPER and score <= alpha:
+                return score
+
+        if depth == 0:
+            self._qnodes_left = QUIESCENCE_NODE_CAP
+            return self.quiesce(position, alpha, beta)
+
+        moves = bitboard.generate_moves(own, other)
+        if not moves:
+            return -NO_MOVES_SCORE
+        side = position.side
+        if len(moves) > 1:
+            self.order_moves(moves, own, other, side, tt_move, ply)
+
+        original_alpha = alpha
+        best_score = -INFINITY
+        best_move = None
+        for index, move in enumerate(moves):
+            position.make_move(move)
+            if position.side == side:
+                score = self.negamax(position, depth - 1, alpha, beta, ply + 1)
+            else:
+                score = -self.negamax(position, depth - 1, -beta, -alpha, ply + 1)
+            position.unmake_move(move)
+            if score > best_score:
+                best_score = score
+                best_move = move
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        self._record_cutoff(move, side, depth, ply, index == 0)
+                        break
+
+        if best_score <= original_alpha:
+            bound = UPPER
+        elif best_score >= beta:
+            bound = LOWER
+        else:
+            bound = EXACT
+        tt.store(key, depth, best_score, bound, best_move)
+        return best_score
+
+    def quiesce(self, position, alpha, beta):
+        """Search captures only until the side to move has none left.
+
+        The side to move may stand pat on the static evaluation or capture;
+        a capture keeps the turn, so whole capture chains are resolved
+        without spending nominal depth.  Stops expanding once the
+        ``QUIESCENCE_NODE_CAP`` budget of the current leaf is used up.
+        """
+        self.nodes += 1
+        self.qnodes += 1
+        if self.nodes >= self._next_check:
+            self._check_limits()
+
+        own, other = position.own_masks()
+        if not own:
+            return -MATE_SCORE
+        if not other:
+            return MATE_SCORE
+        score = self._probe_tablebase(position, 0)
+        if score is not None:
+            return score
+
+        captures = bitboard.generate_captures(own, other)
+        if not captures and not bitboard.has_moves(own, other):
+            return -NO_MOVES_SCORE
+
+        best_score = self.evaluate(position)
+        if best_score >= beta or not captures or self._qnodes_left <= 0:
+            return best_score
+        if best_score > alpha:
+            alpha = best_score
+
+        side = position.side
+        for move in captures:
+            self._qnodes_left -= 1
+            position.make_move(move)
+            if position.side == side:
+                score = self.quiesce(position, alpha, beta)
+            else:
+                score = -self.quiesce(position, -beta, -alpha)
+            position.unmake_move(move)
+            if score > best_score:
+                best_score = score
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+        return best_score
+
+    def _counters(self):
+        return (self.nodes, self.qnodes, self.evaluations, self.cutoffs,
+                self.first_move_cutoffs, self.tt.probes, self.tt.hits, self.tb_hits)
+
+    def _finish_stats(self, stats, counters, start, best_move, best_score, depth):
+        (stats.nodes, stats.qnodes, stats.evaluations, stats.cutoffs,
+         stats.first_move_cutoffs, stats.tt_probes, stats.tt_hits,
+         stats.tb_hits) = [now - then for now, then in zip(self._counters(), counters)]
+        stats.elapsed = time.perf_counter() - start
+        stats.move = best_move
+        stats.score = best_score
+        stats.depth = depth
+        stats.pv = stats.iterations[-1]["pv"] if stats.iterations else []
+
+    def principal_variation(self, position, max_length=MAX_PLY):
+        """Best line from ``position`` as far as the transposition table knows it."""
+        position = position.copy()
+        pv = []
+        seen = set()
+        while len(pv) < max_length and position.key not in seen:
+            seen.add(position.key)
+            entry = self.tt.probe(position.key ^ self._perspective)
+            if entry is None or entry[4] not in position.legal_moves():
+                break
+            pv.append(entry[4])
+            position.make_move(entry[4])
+        return pv
+
+    def search_root(self, position, depth, max_player=None, stats=None):
+        """Search every root move to ``depth`` plies.
+
+        Returns ``(best_move, best_score)``; ties keep the earliest move in
+        generation order, as the original root loops did.  Pass a
+        ``SearchStats`` to have it filled in.
+        """
+        if max_player is not None:
+            self.set_player(max_player)
+        if stats is None:
+            return self._search_moves(position, position.legal_moves(), depth)
+
+        start = time.perf_counter()
+        counters = self._counters()
+        best_move, best_score = self._search_moves(position, position.legal_moves(), depth)
+        if best_move is not None:
+            stats.iterations.append({
+                "depth": depth, "nodes": self.nodes - counters[0],
+                "time": time.perf_counter() - start, "score": best_score,
+                "move": best_move, "pv": self.principal_variation(position, depth),
+            })
+        self._finish_stats(stats, counters, start, best_move, best_score,
+                           depth if best_move is not None else 0)
+        return best_move, best_score
+
+    def _search_moves(self, position, moves, depth, scores=None):
+        best_move = None
+        best_score = -INFINITY
+        side = position.side
+        for move in moves:
+            position.make_move(move)
+            if position.side == side:
+                score = self.negamax(position, depth - 1, best_score, INFINITY, 1)
+            else:
+                score = -self.negamax(position, depth - 1, -INFINITY, -best_score, 1)
+            position.unmake_move(move)
+            if scores is not None:
+                scores[move] = score
+            if score > best_score:
+                best_score = score
+                best_move = move
+        if best_move is not None:
+            self.tt.store(position.key ^ self._perspective, depth, best_score,
+                          EXACT, best_move)
+        return best_move, best_score
+
+    def iterative_deepening(self, position, max_depth, time_limit=None,
+                            node_limit=None, max_player=None, stats=None):
+        """Deepen one ply at a time until ``max_depth`` or a budget runs out.
+
+        ``time_limit`` is in seconds and ``node_limit`` counts nodes for this
+        call.  Each iteration searches the root moves in the order of the
+        previous iteration's scores, best first.  An interrupted iteration is
+        discarded, so the result always comes from the last completed depth.
+        The first iteration is never interrupted.
+
+        Returns ``(best_move, best_score, completed_depth)``.  Pass a
+        ``SearchStats`` to have it filled in.
+        """
+        if max_player is not None:
+            self.set_player(max_player)
+        # Work on a copy: a timeout unwinds the search without unmaking.
+        position = position.copy()
+        moves = position.legal_moves()
+        if not moves:
+            return None, -NO_MOVES_SCORE, 0
+
+        start = time.perf_counter()
+        start_nodes = self.nodes
+        counters = self._counters()
+        self.clear_heuristics()
+        scores = {}
+        best_move = moves[0]
+        best_score = -INFINITY
+        completed = 0
+        try:
+            for depth in range(1, max_depth + 1):
+                iteration_start = time.perf_counter()
+                iteration_nodes = self.nodes
+                try:
+                    move, score = self._search_moves(position, moves, depth, scores)
+                except SearchTimeout:
+                    break
+                best_move, best_score, completed = move, score, depth
+                moves.sort(key=scores.__getitem__, reverse=True)
+                if stats is not None:
+                    stats.iterations.append({
+                        "depth": depth, "nodes": self.nodes - iteration_nodes,
+                        "time": time.perf_counter() - iteration_start, "score": score,
+                        "move": move, "pv": self.principal_variation(position, depth),
+                    })
+
+                if completed == 1:
+                    self.set_limits(
+                        None if time_limit is None else start + time_limit - time.perf_counter(),
+                        None if node_limit is None else start_nodes + node_limit - self.nodes
+                    )
+                # Every piece of one side is lost within the horizon; more
+                # depth will not change the result.
+                if abs(best_score) >= MATE_SCORE - max_depth:
+                    break
+                # The next iteration costs several times this one; do not
+                # start it if it cannot finish in the remaining time.
+                if time_limit is not None and time.perf_counter() - start > time_limit / 2:
+                    break
+        finally:
+            self.clear_limits()
+        if stats is not None:
+            self._finish_stats(stats, counters, start, best_move, best_score, completed)
+        return best_move, best_score, completed
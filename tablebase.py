@@ -0,0 +1,390 @@
+"""Endgame tablebase solved by retrograde analysis.
+
+Every position with at most ``max_pieces`` pieces on the board (and at least
+one of each colour) is solved exactly under the engine rules of
+``bitboard.Position``: a capture keeps the turn unless the capturer is left
+without a move, a side without a legal move loses, and so does a side that
+has lost every piece.
+
+The file holds one ``uint16`` per position, grouped by material signature
+``(red, green)`` and indexed by the combinatorial rank of the Red and Green
+point sets and the side to move::
+
+    0          draw
+    2 * d + 1  win for the side to move in d plies   (d >= 1)
+    2 * d + 2  loss for the side to move in d plies  (d >= 0)
+
+At runtime the file is memory-mapped, so opening it costs nothing and many
+processes share one copy.  Build it with::
+
+    python tablebase.py --pieces 4 -o tablebase.bin
+
+The build checks every stored result against a one-ply search over the
+finished tables before writing the file.
+"""
+
+import argparse
+import mmap
+import struct
+import sys
+import time
+from array import array
+from itertools import combinations
+
+from bitboard import FULL_MASK, JUMPS, NUM_POINTS, STEPS, Position, has_moves, popcount
+
+TABLEBASE_FILE = "tablebase.bin"
+TABLEBASE_MAGIC = b"BBTB"
+_HEADER = struct.Struct("<4sHH")
+_VALUE = struct.Struct("<H")
+
+WIN = 1
+LOSS = -1
+DRAW = 0
+
+DEFAULT_MAX_PIECES = 4
+
+_BINOMIAL = [[0] * (NUM_POINTS + 1) for _ in range(NUM_POINTS + 1)]
+for _n in range(NUM_POINTS + 1):
+    _BINOMIAL[_n][0] = 1
+    for _k in range(1, _n + 1):
+        _BINOMIAL[_n][_k] = _BINOMIAL[_n - 1][_k - 1] + _BINOMIAL[_n - 1][_k]
+
+
+def signatures(max_pieces):
+    """Material signatures ``(red, green)`` in file order."""
+    return [(r, g) for total in range(2, max_pieces + 1)
+            for r in range(1, total) for g in (total - r,)]
+
+
+def table_size(red_count, green_count):
+    return (2 * _BINOMIAL[NUM_POINTS][red_count]
+            * _BINOMIAL[NUM_POINTS - red_count][green_count])
+
+
+def _rank(mask):
+    # Colexicographic rank of a point set among sets of the same size.
+    rank = 0
+    j = 0
+    while mask:
+        low = mask & -mask
+        mask ^= low
+        j += 1
+        rank += _BINOMIAL[low.bit_length() - 1][j]
+    return rank
+
+
+def _compress(mask, removed):
+    # Renumber the points of ``mask`` as if the points in ``removed`` did not
+    # exist, so Green is ranked among the points Red does not occupy.
+    out = 0
+    while mask:
+        low = mask & -mask
+        mask ^= low
+        p = low.bit_length() - 1
+        out |= 1 << (p - popcount(removed & (low - 1)))
+    return out
+
+
+def position_index(red, green, side):
+    """Index of a position inside the table of its material signature."""
+    green_total = _BINOMIAL[NUM_POINTS - popcount(red)][popcount(green)]
+    index = _rank(red) * green_total + _rank(_compress(green, red))
+    return index * 2 + (side == 'G')
+
+
+def _encode(result, distance):
+    if result == WIN:
+        return 2 * distance + 1
+    if result == LOSS:
+        return 2 * distance + 2
+    return 0
+
+
+def _decode(code):
+    if code == 0:
+        return DRAW, 0
+    if code & 1:
+        return WIN, (code - 1) // 2
+    return LOSS, (code - 2) // 2
+
+
+class Tablebase:
+    """Read-only view of a tablebase file (or of freshly built tables)."""
+
+    def __init__(self, max_pieces, data, base=_HEADER.size):
+        self.max_pieces = max_pieces
+        self._data = data
+        self._offsets = {}
+        offset = base
+        for signature in signatures(max_pieces):
+            self._offsets[signature] = offset
+            offset += table_size(*signature) * _VALUE.size
+        self._end = offset
+
+    @classmethod
+    def open(cls, path):
+        """Memory-map a tablebase file."""
+        with open(path, "rb") as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, max_pieces = _HEADER.unpack_from(data)
+        if magic != TABLEBASE_MAGIC or version != 1:
+            raise ValueError(f"Not a tablebase file: {path}")
+        tablebase = cls(max_pieces, data)
+        if len(data) != tablebase._end:
+            raise ValueError(f"Truncated tablebase file: {path}")
+        return tablebase
+
+    def covers(self, red, green):
+        return bool(red and green) and popcount(red) + popcount(green) <= self.max_pieces
+
+    def probe(self, red, green, side):
+        """Return ``(result, distance)`` for the side to move.
+
+        ``result`` is WIN, LOSS or DRAW and ``distance`` counts plies to the
+        end of the game with perfect play.  Positions outside the table
+        return None.
+        """
+        if not self.covers(red, green):
+            return None
+        offset = self._offsets[(popcount(red), popcount(green))]
+        code, = _VALUE.unpack_from(
+            self._data, offset + position_index(red, green, side) * _VALUE.size
+        )
+        return _decode(code)
+
+    def best_move(self, position):
+        """Perfect-play move for ``position`` or None if it is not covered.
+
+        Prefers the fastest win, then a draw, then the slowest loss.
+        """
+        if not self.covers(position.red, position.green):
+            return None
+        side = position.side
+        best = None
+        best_key = None
+        for move in position.legal_moves():
+            position.make_move(move)
+            outcome = self.outcome_after(position, side)
+            position.unmake_move(move)
+            result, distance = outcome
+            key = (result, -distance if result == WIN else distance)
+            if best_key is None or key > best_key:
+                best_key = key
+                best = move
+        return best
+
+    def outcome_after(self, position, side):
+        """``(result, plies)`` for ``side`` once it has moved into ``position``."""
+        _, other = position.own_masks(side)
+        if not other:
+            return WIN, 1
+        result, distance = self.probe(position.red, position.green, position.side)
+        if position.side != side:
+            result = -result
+        return result, distance + 1
+
+
+def _solve_signature(red_count, green_count, solved):
+    """Solve one material signature given all smaller ones in ``solved``."""
+    size = table_size(red_count, green_count)
+    codes = array('H', [0]) * size
+    reds = array('L', [0]) * size
+    greens = array('L', [0]) * size
+    # Per position: same-table moves not yet known to lose, plus the worst
+    # loss distance seen through captures.
+    remaining = array('H', [0]) * size
+    loss_distance = array('H', [0]) * size
+    buckets = {}
+
+    def schedule(distance, index, result):
+        buckets.setdefault(distance, []).append((index, result))
+
+    for red_points in combinations(range(NUM_POINTS), red_count):
+        red = sum(1 << p for p in red_points)
+        free = [p for p in range(NUM_POINTS) if not red >> p & 1]
+        for green_points in combinations(free, green_count):
+            green = sum(1 << p for p in green_points)
+            for side in ('R', 'G'):
+                index = position_index(red, green, side)
+                reds[index] = red
+                greens[index] = green
+                own, other = (red, green) if side == 'R' else (green, red)
+                empty = FULL_MASK ^ (red | green)
+
+                simple = 0
+                best_win = None
+                worst_loss = 0
+                moves = 0
+                rest = own
+                while rest:
+                    low = rest & -rest
+                    rest ^= low
+                    src = low.bit_length() - 1
+                    for dst in STEPS[src]:
+                        if empty >> dst & 1:
+                            simple += 1
+                            moves += 1
+                    for mid, dst in JUMPS[src]:
+                        if other >> mid & 1 and empty >> dst & 1:
+                            moves += 1
+                            new_own = own ^ low ^ (1 << dst)
+                            new_other = other ^ (1 << mid)
+                            if not new_other:
+                                outcome = (WIN, 1)
+                            else:
+                                keeps_turn = has_moves(new_own, new_other)
+                                child_side = side if keeps_turn else ('G' if side == 'R' else 'R')
+                                if side == 'R':
+                                    child_red, child_green = new_own, new_other
+                                else:
+                                    child_red, child_green = new_other, new_own
+                                result, distance = solved.probe(child_red, child_green, child_side)
+                                if not keeps_turn:
+                                    result = -result
+                                outcome = (result, distance + 1)
+                            if outcome[0] == WIN:
+                                if best_win is None or outcome[1] < best_win:
+                                    best_win = outcome[1]
+                            elif outcome[0] == LOSS:
+                                worst_loss = max(worst_loss, outcome[1])
+                            else:
+                                # A drawing capture means the position is at
+                                # least a draw: it can never be lost.
+                                worst_loss = 0xFFFF
+
+                if not moves:
+                    schedule(0, index, LOSS)
+                    continue
+                if best_win is not None:
+                    schedule(best_win, index, WIN)
+                    # A winning capture means the position can never be
+                    # lost, however its simple moves resolve.
+                    worst_loss = 0xFFFF
+                remaining[index] = simple
+                loss_distance[index] = worst_loss
+                if not simple and best_win is None and worst_loss != 0xFFFF:
+                    schedule(worst_loss, index, LOSS)
+
+    distance = 0
+    pending = sum(len(events) for events in buckets.values())
+    while pending:
+        events = buckets.pop(distance, ())
+        pending -= len(events)
+        for index, result in events:
+            if codes[index]:
+                continue
+            codes[index] = _encode(result, distance)
+            # Walk back over the simple moves that lead here: the mover is
+            # the side not to move now, and moved a piece onto its point.
+            red = reds[index]
+            green = greens[index]
+            child_is_green = index & 1
+            if child_is_green:
+                mover, other, parent_side = red, green, 'R'
+            else:
+                mover, other, parent_side = green, red, 'G'
+            empty = FULL_MASK ^ (red | green)
+            rest = mover
+            while rest:
+                low = rest & -rest
+                rest ^= low
+                dst = low.bit_length() - 1
+                for src in STEPS[dst]:
+                    if not empty >> src & 1:
+                        continue
+                    parent_mover = mover ^ low ^ (1 << src)
+                    if parent_side == 'R':
+                        parent = position_index(parent_mover, other, 'R')
+                    else:
+                        parent = position_index(other, parent_mover, 'G')
+                    if codes[parent]:
+                        continue
+                    if result == LOSS:
+                        schedule(distance + 1, parent, WIN)
+                        pending += 1
+                    else:
+                        remaining[parent] -= 1
+                        if not remaining[parent] and loss_distance[parent] != 0xFFFF:
+                            schedule(max(distance + 1, loss_distance[parent]), parent, LOSS)
+                            pending += 1
+        distance += 1
+    return codes
+
+
+def one_ply(tablebase, position):
+    """``(result, distance)`` of ``position`` from the stored results of its moves."""
+    side = position.side
+    outcomes = []
+    for move in position.legal_moves():
+        position.make_move(move)
+        outcomes.append(tablebase.outcome_after(position, side))
+        position.unmake_move(move)
+    if not outcomes:
+        return LOSS, 0
+    wins = [distance for result, distance in outcomes if result == WIN]
+    if wins:
+        return WIN, min(wins)
+    if any(result == DRAW for result, _ in outcomes):
+        return DRAW, 0
+    return LOSS, max(distance for _, distance in outcomes)
+
+
+def verify(tablebase, log=print):
+    """Check every stored result against ``one_ply``; returns the mismatch count."""
+    mismatches = 0
+    started = time.perf_counter()
+    for red_count, green_count in signatures(tablebase.max_pieces):
+        for red_points in combinations(range(NUM_POINTS), red_count):
+            red = sum(1 << p for p in red_points)
+            free = [p for p in range(NUM_POINTS) if not red >> p & 1]
+            for green_points in combinations(free, green_count):
+                green = sum(1 << p for p in green_points)
+                for side in ('R', 'G'):
+                    stored = tablebase.probe(red, green, side)
+                    expected = one_ply(tablebase, Position(red, green, side))
+                    if stored != expected:
+                        mismatches += 1
+                        if mismatches <= 10:
+                            log(f"mismatch red={red} green={green} {side} to move: "
+                                f"stored {stored}, one ply gives {expected}")
+        log(f"verified {red_count} red / {green_count} green "
+            f"({time.perf_counter() - started:.1f}s)")
+    return mismatches
+
+
+def build(max_pieces=DEFAULT_MAX_PIECES, log=print):
+    """Solve every signature up to ``max_pieces`` and return the raw file bytes."""
+    header = _HEADER.pack(TABLEBASE_MAGIC, 1, max_pieces)
+    tables = []
+    started = time.perf_counter()
+    for signature in signatures(max_pieces):
+        data = header + b"".join(table.tobytes() for table in tables)
+        solved = Tablebase(max_pieces, data)
+        codes = _solve_signature(signature[0], signature[1], solved)
+        if sys.byteorder != "little":
+            codes.byteswap()
+        tables.append(codes)
+        log(f"solved {signature[0]} red / {signature[1]} green: {len(codes)} positions "
+            f"({time.perf_counter() - started:.1f}s)")
+    return header + b"".join(table.tobytes() for table in tables)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the Bagh Bandi endgame tablebase.")
+    parser.add_argument("--pieces", type=int, default=DEFAULT_MAX_PIECES,
+                        help="largest total number of pieces to solve")
+    parser.add_argument("-o", "--output", default=TABLEBASE_FILE)
+    args = parser.parse_args()
+
+    data = build(args.pieces)
+    mismatches = verify(Tablebase(args.pieces, data))
+    if mismatches:
+        raise SystemExit(f"{mismatches} positions disagree with their moves; not writing {args.output}")
+    with open(args.output, "wb") as f:
+        f.write(data)
+    print(f"Wrote {len(data)} bytes to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+"""Headless AI-vs-AI tournament with Elo and throughput reporting.
+
+Every pair of players meets in ``--games`` games.  Games come in pairs that
+share a random opening (``--random-plies`` random moves from the initial
+position) with colours swapped, so neither side profits from the opening.
+A game still running after ``--max-moves`` plies is scored as a draw.  A
+game that raises is recorded as failed: it is not scored, the failures are
+counted in the report, and the script exits with status 1.
+
+A player is a difficulty with optional settings after a colon::
+
+    python tournament.py Hard Medium --games 200 --workers 8
+    python tournament.py Hard:time=0.2 Hard:time=0.2,book=0,tb=0 --games 1000
+    python tournament.py Hard MCTS:time=none,playouts=5000
+
+Settings: ``time`` (seconds per move), ``depth`` (maximum depth), ``nodes``
+(node budget per move), ``book`` and ``tb`` (0 to disable the opening book
+or the endgame tablebase) for Hard, and ``time`` and ``playouts`` (playout
+budget per move) for MCTS.
+"""
+
+import argparse
+import json
+import math
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import engine
+
+DEFAULT_MAX_MOVES = 200
+DEFAULT_RANDOM_PLIES = 4
+
+
+def parse_player(spec):
+    """Turn ``"Hard:time=0.5,tb=0"`` into a settings dict."""
+    difficulty, _, options = spec.partition(":")
+    if difficulty not in engine.DIFFICULTIES:
+        raise ValueError(f"Unknown difficulty: {difficulty}")
+    player = {
+        "name": spec,
+        "difficulty": difficulty,
+        "time": engine.MCTS_TIME_LIMIT if difficulty == "MCTS" else engine.HARD_TIME_LIMIT,
+        "depth": engine.HARD_MAX_DEPTH,
+        "nodes": engine.HARD_NODE_LIMIT,
+        "playouts": engine.MCTS_PLAYOUTS,
+        "book": True,
+        "tb": True,
+    }
+    for option in filter(None, options.split(",")):
+        key, _, value = option.partition("=")
+        if key == "time":
+            player["time"] = float(value) if value != "none" else None
+        elif key in ("depth", "nodes", "playouts"):
+            player[key] = int(value) if value != "none" else None
+        elif key in ("book", "tb"):
+            player[key] = value not in ("0", "no", "off", "false")
+        else:
+            raise ValueError(f"Unknown setting in {spec}: {key}")
+    return player
+
+
+def make_ai(player):
+    game = engine.Game(
+        opening_book=engine.load_opening_book() if player["book"] else None,
+        tablebase=engine.load_tablebase() if player["tb"] else None,
+    )
+    game.hard_time_limit = player["time"]
+    game.hard_max_depth = player["depth"]
+    game.hard_node_limit = player["nodes"]
+    game.mcts_time_limit = player["time"]
+    game.mcts_playouts = player["playouts"]
+    return game
+
+
+def _nodes(ai):
+    """Nodes searched so far, counting MCTS playouts as nodes."""
+    return ai.searcher.nodes + ai.mcts_searcher.playouts
+
+
+def play_game(red, green, seed, random_plies=DEFAULT_RANDOM_PLIES,
+              max_moves=DEFAULT_MAX_MOVES):
+    """Play one game and return a result dict.
+
+    ``red`` and ``green`` are player settings from ``parse_player``.  The
+    opening depends only on ``seed``.
+    """
+    state = engine.Game()
+    opening = random.Random(seed)
+    for _ in range(random_plies):
+        moves = state.legal_moves()
+        if not moves:
+            break
+        state.apply_move(opening.choice(moves))
+
+    random.seed(seed)  # Easy picks its moves with the global generator
+    players = {'R': red, 'G': green}
+    ais = {'R': make_ai(red), 'G': make_ai(green)}
+    stats = {side: {"moves": 0, "time": 0.0, "nodes": 0} for side in "RG"}
+    plies = random_plies
+
+    while not state.winner and plies < max_moves:
+        side = state.current_player
+        ai = ais[side]
+        nodes = _nodes(ai)
+        start = time.perf_counter()
+        move = ai.get_best_move_ai(state.board, side, players[side]["difficulty"])
+        elapsed = time.perf_counter() - start
+        if move is None:
+            break
+        stats[side]["moves"] += 1
+        stats[side]["time"] += elapsed
+        stats[side]["nodes"] += _nodes(ai) - nodes
+        state.apply_move(move)
+        plies += 1
+
+    return {
+        "red": red["name"],
+        "green": green["name"],
+        "seed": seed,
+        "winner": state.winner,
+        "plies": plies,
+        "stats": stats,
+    }
+
+
+def elo(score):
+    if score <= 0:
+        return -math.inf
+    if score >= 1:
+        return math.inf
+    return 400 * math.log10(score / (1 - score))
+
+
+def elo_interval(points):
+    """Elo difference and 95% confidence bounds from per-game scores."""
+    n = len(points)
+    mean = sum(points) / n
+    variance = sum((p - mean) ** 2 for p in points) / n
+    margin = 1.96 * math.sqrt(variance / n)
+    return elo(mean), elo(mean - margin), elo(mean + margin)
+
+
+def schedule(players, games, first_seed):
+    """Game list: for each pairing, colour-swapped pairs of shared openings."""
+    tasks = []
+    seed = first_seed
+    for i, a in enumerate(players):
+        for b in players[i + 1:]:
+            for n in range(games):
+                if n % 2 == 0:
+                    seed += 1
+                    tasks.append((a, b, seed))
+                else:
+                    tasks.append((b, a, seed))
+    return tasks
+
+
+def failed_result(red, green, seed, error):
+    """Result dict of a game that raised ``error`` instead of finishing."""
+    return {
+        "red": red["name"],
+        "green": green["name"],
+        "seed": seed,
+        "error": f"{type(error).__name__}: {error}",
+    }
+
+
+def report(players, results, elapsed):
+    failed = sum("error" in result for result in results)
+    summary = f"{len(results)} games in {elapsed:.1f}s"
+    if failed:
+        summary += f", {failed} failed and not scored"
+    print(f"\n{summary}\n")
+    for i, a in enumerate(players):
+        for b in players[i + 1:]:
+            points = []
+            pairing_failed = 0
+            for result in results:
+                if {result["red"], result["green"]} != {a["name"], b["name"]}:
+                    continue
+                if "error" in result:
+                    pairing_failed += 1
+                    continue
+                a_side = 'R' if result["red"] == a["name"] else 'G'
+                if result["winner"] is None:
+                    points.append(0.5)
+                else:
+                    points.append(1.0 if result["winner"] == a_side else 0.0)
+            failures = f"  ({pairing_failed} failed)" if pairing_failed else ""
+            if not points:
+                if pairing_failed:
+                    print(f"{a['name']} vs {b['name']}: no games scored{failures}")
+                continue
+            wins = points.count(1.0)
+            draws = points.count(0.5)
+            losses = points.count(0.0)
+            diff, low, high = elo_interval(points)
+            print(f"{a['name']} vs {b['name']}: +{wins} ={draws} -{losses}  "
+                  f"score {sum(points) / len(points):.3f}  "
+                  f"Elo {diff:+.0f} [{low:+.0f}, {high:+.0f}]{failures}")
+
+    print()
+    for player in players:
+        moves = seconds = nodes = 0
+        for result in results:
+            if "error" in result:
+                continue
+            for side, colour in (('R', "red"), ('G', "green")):
+                if result[colour] == player["name"]:
+                    moves += result["stats"][side]["moves"]
+                    seconds += result["stats"][side]["time"]
+                    nodes += result["stats"][side]["nodes"]
+        if moves:
+            nps = nodes / seconds if seconds else 0
+            print(f"{player['name']:<30} {1000 * seconds / moves:8.1f} ms/move  "
+                  f"{nps:9.0f} nodes/s  {moves} moves")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play AI-vs-AI tournaments headlessly.")
+    parser.add_argument("players", nargs="+", help="e.g. Hard, Medium, Hard:time=0.5,tb=0")
+    parser.add_argument("--games", type=int, default=100, help="games per pairing")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes (default: one per CPU)")
+    parser.add_argument("--max-moves", type=int, default=DEFAULT_MAX_MOVES,
+                        help="plies before a game is scored as a draw")
+    parser.add_argument("--random-plies", type=int, default=DEFAULT_RANDOM_PLIES,
+                        help="random opening moves played before the AIs take over")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", help="append every game result to this JSONL file")
+    args = parser.parse_args()
+
+    players = [parse_player(spec) for spec in args.players]
+    if len(players) < 2:
+        parser.error("need at least two players")
+    if len({p["name"] for p in players}) != len(players):
+        parser.error("players must be distinct")
+
+    tasks = schedule(players, args.games, args.seed)
+    results = []
+    output = open(args.output, "a") if args.output else None
+    start = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            futures = {
+                pool.submit(play_game, red, green, seed, args.random_plies, args.max_moves):
+                    (red, green, seed)
+                for red, green, seed in tasks
+            }
+            for future in as_completed(futures):
+                try:
+                    result = future.result()
+                except Exception as e:
+                    red, green, seed = futures[future]
+                    print(f"Game failed ({red['name']} vs {green['name']}, seed {seed}):", e)
+                    result = failed_result(red, green, seed, e)
+                results.append(result)
+                if output:
+                    output.write(json.dumps(result) + "\n")
+                    output.flush()
+                if len(results) % 10 == 0 or len(results) == len(tasks):
+                    print(f"{len(results)}/{len(tasks)} games  "
+                          f"{time.perf_counter() - start:.0f}s", flush=True)
+    finally:
+        if output:
+            output.close()
+
+    report(players, results, time.perf_counter() - start)
+    if any("error" in result for result in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()